@@ -0,0 +1,194 @@
+"""
+Opt-in cache of whole agent answers for FAQ-style questions (ANSWER_CACHE=1).
+
+Visitors keep opening with the same canonical questions (refund policy,
+company history, locations) that the knowledge base answers the same way
+every time. When a conversation's first question finishes, its answer (the
+chat text plus every render_ui card) is stored under
+
+    (normalized question, canvas size bucket)
+
+The bucket is the cards-per-row band of the canvas_intelligence layout
+matrix, so a card sized for a wide canvas isn't replayed on a phone. The
+next conversation that opens with the same question gets that answer
+replayed without a model call: the text and render_ui calls are emitted to
+the frontend through CopilotKit's manual-emit events, and the follow-up
+run after rendering also ends without a model call.
+
+Only first questions are cached, since later ones may depend on the
+conversation; answers that change state (theme, deleted cards) or reply to
+form submissions are never cached either. Entries expire after
+ANSWER_CACHE_TTL seconds, and all of them are dropped when index_version
+changes, i.e. when the knowledge base is re-ingested. stats() reports hits,
+misses and stores.
+"""
+
+import os
+import uuid
+
+from langchain.agents.middleware import AgentMiddleware, hook_config
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.config import get_config
+
+from prompt_builder import message_text
+from search_cache import VersionedLRU, normalize_query
+from structure import CARD_TOOLS, frontend_renders
+
+ANSWER_CACHE = os.getenv("ANSWER_CACHE", "") not in ("", "0")
+
+# Tools an answer may have used and still be safe to replay
+CACHEABLE_TOOLS = CARD_TOOLS + ("search_knowledge_base",)
+EMIT_MESSAGE_EVENT = "copilotkit_manually_emit_message"
+EMIT_TOOL_CALL_EVENT = "copilotkit_manually_emit_tool_call"
+
+
+def canvas_bucket(state):
+    """Cards per row for the canvas width, as in canvas_intelligence.layout_matrix."""
+    width = state.get("canvas_width") or 0
+    if width >= 1400:
+        return 4
+    if width >= 1000:
+        return 3
+    if width >= 800:
+        return 2
+    return 1
+
+
+class AnswerCache(VersionedLRU):
+    """Cached answers by (normalized question, canvas bucket)."""
+
+    def __init__(self, maxsize=256, ttl=3600.0):
+        super().__init__(maxsize, ttl)
+
+
+answer_cache = AnswerCache(
+    maxsize=int(os.getenv("ANSWER_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+)
+
+
+def _first_question(messages):
+    """The opening question if `messages` are still on the first turn, else None."""
+    questions = [message for message in messages if isinstance(message, HumanMessage)]
+    if len(questions) != 1:
+        return None
+    text = message_text(questions[0])
+    if not text or text.startswith("[Form Submitted"):
+        return None
+    return text
+
+
+def _is_replayed(message):
+    return isinstance(message, AIMessage) and message.response_metadata.get("answer_cache")
+
+
+class AnswerCacheMiddleware(AgentMiddleware):
+    """Replays cached answers to first questions and stores new ones."""
+
+    def __init__(self, cache=None):
+        super().__init__()
+        self.cache = cache if cache is not None else answer_cache
+
+    def _key(self, question, state):
+        return (normalize_query(question), canvas_bucket(state))
+
+    def _lookup(self, state):
+        messages = state["messages"]
+        if not messages:
+            return None
+        last = messages[-1]
+
+        # Frontend reporting back after rendering a replayed answer: nothing to add
+        if isinstance(last, ToolMessage):
+            previous = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+            return ("done", None) if _is_replayed(previous) else None
+
+        if not isinstance(last, HumanMessage):
+            return None
+        question = _first_question(messages)
+        if question is None:
+            return None
+        key = self._key(question, state)
+        answer = self.cache.get(key)
+        if answer is None:
+            return None
+        print(f"📦 Answer cache hit: {key}")
+        return ("hit", answer)
+
+    def _replay(self, answer, frontend):
+        message = AIMessage(
+            id=f"answer-cache-{uuid.uuid4().hex}",
+            content=answer["text"],
+            tool_calls=[{"id": f"call_{uuid.uuid4().hex[:24]}", **call} for call in answer["tool_calls"]],
+            response_metadata={"answer_cache": True},
+        )
+        replayed = [message]
+        if not frontend:
+            # No frontend to answer the card calls; answer them here
+            replayed += [
+                ToolMessage(content=f"UI card '{call['args'].get('title', '')}' rendered.", tool_call_id=call["id"], name=call["name"])
+                for call in message.tool_calls
+            ]
+        return replayed
+
+    @hook_config(can_jump_to=["end"])
+    def before_model(self, state, runtime):
+        found = self._lookup(state)
+        if found is None:
+            return None
+        kind, answer = found
+        if kind == "done":
+            return {"jump_to": "end"}
+        return {"messages": self._replay(answer, frontend_renders(state)), "jump_to": "end"}
+
+    @hook_config(can_jump_to=["end"])
+    async def abefore_model(self, state, runtime):
+        found = self._lookup(state)
+        if found is None:
+            return None
+        kind, answer = found
+        if kind == "done":
+            return {"jump_to": "end"}
+
+        frontend = frontend_renders(state)
+        replayed = self._replay(answer, frontend)
+        if frontend:
+            # Nothing is streamed from a model, so hand the frontend the text
+            # and the card calls directly
+            config = get_config()
+            message = replayed[0]
+            if message.content:
+                await adispatch_custom_event(
+                    EMIT_MESSAGE_EVENT,
+                    {"message": message.content, "message_id": message.id, "role": "assistant"},
+                    config=config,
+                )
+            for call in message.tool_calls:
+                await adispatch_custom_event(
+                    EMIT_TOOL_CALL_EVENT, {"name": call["name"], "args": call["args"], "id": call["id"]}, config=config
+                )
+        return {"messages": replayed, "jump_to": "end"}
+
+    def after_agent(self, state, runtime):
+        messages = state["messages"]
+        if not messages or not isinstance(messages[-1], AIMessage) or messages[-1].tool_calls:
+            return None
+        # Card calls still waiting for the frontend: the turn isn't over yet
+        if (state.get("copilotkit") or {}).get("intercepted_tool_calls"):
+            return None
+        question = _first_question(messages)
+        if question is None:
+            return None
+
+        answer_messages = [m for m in messages if isinstance(m, AIMessage)]
+        if any(_is_replayed(m) for m in answer_messages):
+            return None
+        calls = [call for m in answer_messages for call in m.tool_calls]
+        if any(call["name"] not in CACHEABLE_TOOLS for call in calls):
+            return None
+        cards = [{"name": call["name"], "args": call["args"]} for call in calls if call["name"] in CARD_TOOLS]
+        text = "\n\n".join(message_text(m) for m in answer_messages if message_text(m))
+        if text or cards:
+            self.cache.put(self._key(question, state), {"text": text, "tool_calls": cards})
+        return None
@@ -0,0 +1,119 @@
+"""
+Model calls and latency for repeated FAQ questions, with and without the
+answer cache.
+
+A scripted model (--latency seconds per call) answers each question with a
+knowledge-base search, then a render_ui card plus a short text, through the
+real create_agent loop. --conversations new conversations open with one of
+the FAQ questions (phrased slightly differently, and from canvases of
+different widths), first without AnswerCacheMiddleware and then with it.
+Afterwards the knowledge base is marked re-ingested and one question is
+asked again, to show the cache dropping its entries.
+
+index_version is redirected to a temporary file, so the real chroma_db is
+not touched.
+
+    cd agent && python -m benchmarks.answer_cache --conversations 40 --latency 0.3
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+# The chat model is never called, but importing main constructs it
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain.agents import create_agent
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+
+import index_version
+from main import AgentState, render_ui
+from answer_cache import AnswerCache, AnswerCacheMiddleware
+from benchmarks.stub_model import ScriptedChatModel
+
+FAQ = [
+    ["What is your refund policy?", "what's your refund policy", "What is your Refund Policy"],
+    ["Tell me about the company history", "tell me about the company history!"],
+    ["Where are your offices located?", "where are your offices located"],
+]
+CANVAS_WIDTHS = [1280, 1280, 1600, 390]
+
+
+@tool
+def search_knowledge_base(query: str) -> str:
+    """Search the knowledge base."""
+    return json.dumps({"results": [{"source": "knowledge.txt", "content": [f"Facts about {query}."]}]})
+
+
+def respond(messages):
+    question = next(m.content for m in messages if isinstance(m, HumanMessage))
+    if not isinstance(messages[-1], ToolMessage):
+        return AIMessage(content="", tool_calls=[{"id": "search-1", "name": "search_knowledge_base", "args": {"query": question}}])
+    if messages[-1].name == "search_knowledge_base":
+        card = {"id": "faq", "title": question, "content": [{"type": "markdown", "content": f"**{question}**\n\nHere is what we know."}]}
+        return AIMessage(content="", tool_calls=[{"id": "card-1", "name": "render_ui", "args": card}])
+    return AIMessage(content="Here you go!")
+
+
+async def ask(agent, question, width):
+    started = time.perf_counter()
+    result = await agent.ainvoke({"messages": [HumanMessage(content=question)], "canvas_width": width})
+    return time.perf_counter() - started, result["messages"][-1]
+
+
+async def run_conversations(model, middleware, conversations, seed):
+    rng = random.Random(seed)
+    agent = create_agent(model=model, tools=[search_knowledge_base, render_ui], middleware=middleware, state_schema=AgentState)
+    calls_before, elapsed = model.calls, []
+    for _ in range(conversations):
+        question = rng.choice(rng.choice(FAQ))
+        seconds, _ = await ask(agent, question, rng.choice(CANVAS_WIDTHS))
+        elapsed.append(seconds)
+    return {
+        "model_calls": model.calls - calls_before,
+        "total_s": round(sum(elapsed), 2),
+        "mean_ms": round(1000 * sum(elapsed) / len(elapsed), 1),
+    }
+
+
+async def run(args):
+    model = ScriptedChatModel(respond=respond, latency=args.latency)
+    report = {"conversations": args.conversations}
+    report["uncached"] = await run_conversations(model, [], args.conversations, args.seed)
+
+    cache = AnswerCache(maxsize=256, ttl=3600)
+    middleware = [AnswerCacheMiddleware(cache)]
+    report["cached"] = await run_conversations(model, middleware, args.conversations, args.seed)
+    report["cached"]["stats"] = cache.stats()
+
+    # Re-ingestion: the next lookup drops everything and misses
+    agent = create_agent(model=model, tools=[search_knowledge_base, render_ui], middleware=middleware, state_schema=AgentState)
+    index_version.bump()
+    calls_before = model.calls
+    _, last = await ask(agent, FAQ[0][0], 1280)
+    report["after_reingest"] = {"model_calls": model.calls - calls_before, "answer": last.content, "stats": cache.stats()}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per model call")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        index_version.INDEX_VERSION_PATH = os.path.join(directory, "index_version")
+        report = asyncio.run(run(args))
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Validation throughput for render_ui content on large card payloads.
+
+Builds --cards cards of --blocks mixed content blocks each (every block
+type the frontend renders) and times, per full payload:
+
+- legacy:      the old single wide ContentBlock model (accepts almost anything)
+- adapter:     the discriminated union through the prebuilt TypeAdapter
+- per_call:    the same union with a TypeAdapter built on every call
+- errors:      content_errors() on the same payload with one bad block per card
+
+    cd agent && python -m benchmarks.card_validation --cards 8 --blocks 24 --rounds 200
+"""
+
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, TypeAdapter
+
+from structure import CONTENT_VALIDATOR, ContentBlock, content_errors
+
+
+class LegacyContentBlock(BaseModel):
+    """structure.ContentBlock before the per-type models."""
+    type: str
+    content: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+    url: Optional[str] = None
+    alt: Optional[str] = None
+    fields: Optional[List[Dict[str, Any]]] = None
+    submitLabel: Optional[str] = None
+    action: Optional[str] = None
+    text: Optional[str] = None
+    items: Optional[List[Dict[str, Any]]] = None
+
+
+LEGACY_VALIDATOR = TypeAdapter(List[LegacyContentBlock])
+
+
+def block(i):
+    kind = i % 6
+    if kind == 0:
+        return {"type": "markdown", "content": f"### Section {i}\n\n" + "Some **rich** copy. " * 8}
+    if kind == 1:
+        return {"type": "flashcards", "items": [{"title": f"Item {n}", "description": "Short description.", "icon": "⚡"} for n in range(6)]}
+    if kind == 2:
+        return {"type": "key_value", "data": {f"Key {n}": f"Value {n}" for n in range(8)}}
+    if kind == 3:
+        return {"type": "image", "url": f"https://example.com/img/{i}.png", "alt": "Illustration"}
+    if kind == 4:
+        return {
+            "type": "form",
+            "action": "contact",
+            "submitLabel": "Send",
+            "fields": [
+                {"name": "email", "label": "Email", "type": "email", "required": True},
+                {"name": "topic", "label": "Topic", "type": "select", "options": [{"label": "Sales", "value": "sales"}]},
+            ],
+        }
+    return {"type": "link", "url": "https://example.com", "label": "Learn more"}
+
+
+def payload(cards, blocks, broken=False):
+    result = []
+    for card in range(cards):
+        content = [block(card * blocks + i) for i in range(blocks)]
+        if broken:
+            content[1] = {"type": "flashcards", "items": [{"title": "Missing description"}]}
+        result.append(content)
+    return result
+
+
+def bench(validate, cards, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for content in cards:
+            validate(content)
+    elapsed = time.perf_counter() - started
+    blocks = rounds * sum(len(content) for content in cards)
+    return {
+        "payload_ms": round(1000 * elapsed / rounds, 3),
+        "blocks_per_s": round(blocks / elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=8)
+    parser.add_argument("--blocks", type=int, default=24)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    valid = payload(args.cards, args.blocks)
+    broken = payload(args.cards, args.blocks, broken=True)
+    assert all(not content_errors(content) for content in valid)
+    assert all(content_errors(content) for content in broken)
+
+    report = {
+        "cards": args.cards,
+        "blocks_per_card": args.blocks,
+        "payload_bytes": len(json.dumps(valid)),
+        "legacy": bench(LEGACY_VALIDATOR.validate_python, valid, args.rounds),
+        "adapter": bench(CONTENT_VALIDATOR.validate_python, valid, args.rounds),
+        "per_call": bench(lambda c: TypeAdapter(List[ContentBlock]).validate_python(c), valid, args.rounds),
+        "errors": bench(content_errors, broken, args.rounds),
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Image metadata per chunk: the page's first ten image URLs on every chunk
+(old) vs. the IDs of the images in or near each chunk, with the URLs
+interned once in image_table (new).
+
+Parses saved pages (--corpus DIR of *.html, or generated product pages)
+with page_parser and reports:
+
+- images per chunk, and how many of them appear in the chunk's own text
+- Chroma metadata bytes spent on images, in total and per chunk (the new
+  side table is counted too: each URL plus its ID, once)
+- search_knowledge_base payload tokens for --k chunks of the same page,
+  the common case for a product question
+
+    cd agent && python -m benchmarks.chunk_images --corpus saved_pages/ --k 3
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+
+# The chat model is never called, but importing main constructs it
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_core.documents import Document
+
+import image_table
+from image_table import ImageTable, image_id
+from main import encode_results
+from page_parser import parse_page
+from benchmarks.page_extraction import parse_page_legacy
+from benchmarks.parse_pool import load_corpus
+from benchmarks.prompt_tokens import token_counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of saved *.html pages")
+    parser.add_argument("--pages", type=int, default=32, help="Synthetic pages when no corpus is given")
+    parser.add_argument("--k", type=int, default=3, help="Results per search")
+    parser.add_argument("--encoding", default="o200k_base")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    count, counter = token_counter(args.encoding)
+    with tempfile.TemporaryDirectory() as directory:
+        table = image_table._image_table = ImageTable(os.path.join(directory, "images.sqlite3"))
+
+        chunks = legacy_bytes = new_bytes = legacy_images = new_images = in_text = 0
+        legacy_tokens = new_tokens = searches = 0
+        for url, html in load_corpus(args):
+            page = parse_page(url, html)
+            _, _, page_images, _ = parse_page_legacy(url, html)
+            legacy_urls = ",".join(page_images[:10])
+
+            legacy_docs, new_docs = [], []
+            for i, text, urls in page.chunks:
+                ids = table.intern(urls)
+                legacy_docs.append(Document(page_content=text, metadata={"source": url, "image_urls": legacy_urls}))
+                new_docs.append(Document(page_content=text, metadata={"source": url, "image_ids": ",".join(ids)}))
+                legacy_bytes += len(legacy_urls)
+                new_bytes += len(",".join(ids))
+                legacy_images += len(page_images[:10])
+                new_images += len(urls)
+                in_text += sum(1 for image_url in urls if image_url.rsplit("/", 1)[-1] in text)
+                chunks += 1
+
+            if len(page.chunks) >= args.k:
+                picked = rng.sample(range(len(page.chunks)), args.k)
+                legacy_tokens += count(encode_results([legacy_docs[i] for i in picked]))
+                new_tokens += count(encode_results([new_docs[i] for i in picked]))
+                searches += 1
+
+        side_table = sum(len(image_url) + len(image_id(image_url)) for image_url in table._urls.values())
+
+    report = {
+        "counter": counter,
+        "chunks": chunks,
+        "images_per_chunk": {
+            "legacy": round(legacy_images / chunks, 2),
+            "new": round(new_images / chunks, 2),
+            "new_in_chunk_text": round(in_text / chunks, 2),
+        },
+        "image_metadata_bytes": {
+            "legacy": legacy_bytes,
+            "new": new_bytes,
+            "new_side_table": side_table,
+            "legacy_per_chunk": round(legacy_bytes / chunks, 1),
+            "new_per_chunk": round((new_bytes + side_table) / chunks, 1),
+        },
+        "search_payload_tokens": {
+            "searches": searches,
+            "legacy_mean": round(legacy_tokens / searches, 1) if searches else None,
+            "new_mean": round(new_tokens / searches, 1) if searches else None,
+        },
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Crawl scheduling against a local fixture site: plain link-following BFS vs.
+robots.txt + sitemap seeding + the priority frontier.
+
+Generates a small shop in a temporary directory and serves it on
+127.0.0.1 with http.server:
+
+- a home page linking to tag pages, paginated listings, a /private/ area
+  and categories; products are three hops down (category -> subcategory
+  -> product)
+- robots.txt disallowing /private/, with a Crawl-delay and the sitemap
+- a sitemap index pointing at a product sitemap with lastmod dates, part of
+  them fresh and part of them years old
+
+Both crawls run the real JewelScraper with the same --max-pages budget. The
+index, crawl state, history and image table are redirected to the temp
+directory, and embeddings use the offline hashing embedder. Per crawl, the
+report shows pages fetched, products and fresh products among them,
+/private/ fetches, the smallest gap between two page requests (compare with
+the crawl delay) and wall time.
+
+    cd agent && python -m benchmarks.crawl_schedule --max-pages 20 --crawl-delay 1
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import contextlib
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+import embeddings
+import image_table
+import index_version
+import insert_data_db
+from embeddings import EmbeddingService, HashingEmbeddings
+from image_table import ImageTable
+from scraper import JewelScraper
+
+FRESH_DAYS = 30
+
+
+def page(title, links, body=""):
+    anchors = "".join(f'<li><a href="{href}">{text}</a></li>' for href, text in links)
+    return f"<html><head><title>{title}</title></head><body><main><h1>{title}</h1><p>{body}</p><ul>{anchors}</ul></main></body></html>"
+
+
+def write_site(root, base, products, crawl_delay):
+    def write(path, content):
+        full = os.path.join(root, path.lstrip("/"))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write(content)
+
+    categories, per_category = 3, 3
+    home_links = [(f"/tag/{n}.html", f"Tag {n}") for n in range(20)]
+    home_links += [(f"/listing.html?page={n}", f"Page {n}") for n in range(1, 6)]
+    home_links += [(f"/private/{n}.html", f"Internal {n}") for n in range(5)]
+    home_links += [(f"/category/{c}.html", f"Category {c}") for c in range(categories)]
+    write("/index.html", page("Jewel Shop", home_links, "Welcome to the shop."))
+    write("/listing.html", page("All items", [(f"/listing.html?page={n}", f"Page {n}") for n in range(1, 6)]))
+    for n in range(20):
+        write(f"/tag/{n}.html", page(f"Tag {n}", [(f"/tag/{(n + i) % 20}.html", "Related tag") for i in range(1, 4)], "Tagged items."))
+    for n in range(5):
+        write(f"/private/{n}.html", page(f"Internal {n}", [], "Staff only."))
+
+    now = datetime.now(timezone.utc)
+    fresh, urls = set(), []
+    for c in range(categories):
+        subs = [(f"/category/{c}/sub/{s}.html", f"Subcategory {s}") for s in range(per_category)]
+        write(f"/category/{c}.html", page(f"Category {c}", subs))
+        for s in range(per_category):
+            items = [p for p in range(products) if p % (categories * per_category) == c * per_category + s]
+            write(f"/category/{c}/sub/{s}.html", page(f"Subcategory {c}.{s}", [(f"/products/{p}.html", f"Product {p}") for p in items]))
+    for p in range(products):
+        write(f"/products/{p}.html", page(f"Product {p}", [("/index.html", "Home")], f"Hand made ring number {p}. " * 20))
+        age = timedelta(days=p % 10) if p % 3 == 0 else timedelta(days=400 + p)
+        if age.days < FRESH_DAYS:
+            fresh.add(f"/products/{p}.html")
+        urls.append(f"<url><loc>{base}/products/{p}.html</loc><lastmod>{(now - age).date().isoformat()}</lastmod><priority>0.8</priority></url>")
+
+    write("/sitemap-products.xml", '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">' + "".join(urls) + "</urlset>")
+    write("/sitemap_index.xml", f'<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"><sitemap><loc>{base}/sitemap-products.xml</loc></sitemap></sitemapindex>')
+    write("/robots.txt", f"User-agent: *\nDisallow: /private/\nCrawl-delay: {crawl_delay}\nSitemap: {base}/sitemap_index.xml\n")
+    return fresh
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((time.perf_counter(), self.path.split("?")[0]))
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def crawl(base, directory, fresh, max_pages, **options):
+    """Runs one JewelScraper session against the fixture server with storage in `directory`."""
+    os.makedirs(directory)
+    insert_data_db.open_store(os.path.join(directory, "chroma"))
+    image_table._image_table = ImageTable(os.path.join(directory, "images.sqlite3"))
+
+    scraper = JewelScraper(
+        f"{base}/", max_depth=5, max_pages=max_pages, parse_workers=0, flush_interval=0.2,
+        crawl_state_path=os.path.join(directory, "crawl_state.sqlite3"),
+        history_path=os.path.join(directory, "scraped_urls.txt"),
+        **options,
+    )
+
+    FixtureHandler.requests.clear()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        scraper.scrape()
+    elapsed = time.perf_counter() - started
+
+    pages = [(at, path) for at, path in FixtureHandler.requests if path.endswith(".html") or path == "/"]
+    gaps = [b[0] - a[0] for a, b in zip(pages, pages[1:])]
+    products = [path for _, path in pages if path.startswith("/products/")]
+    return {
+        "pages_fetched": len(pages),
+        "products": len(products),
+        "fresh_products": sum(1 for path in products if path in fresh),
+        "private_fetched": sum(1 for _, path in pages if path.startswith("/private/")),
+        "min_gap_ms": round(1000 * min(gaps), 1) if gaps else None,
+        "seconds": round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=60)
+    parser.add_argument("--max-pages", type=int, default=20)
+    parser.add_argument("--crawl-delay", type=int, default=1, help="Whole seconds, as robots.txt parsers read it")
+    args = parser.parse_args()
+
+    embeddings._service = EmbeddingService(HashingEmbeddings(), cache_path=None)
+    with tempfile.TemporaryDirectory() as directory:
+        index_version.INDEX_VERSION_PATH = os.path.join(directory, "index_version")
+        site = os.path.join(directory, "site")
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=site))
+        base = f"http://127.0.0.1:{server.server_port}"
+        fresh = write_site(site, base, args.products, args.crawl_delay)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            report = {
+                "products_on_site": args.products,
+                "fresh_products_on_site": len(fresh),
+                "max_pages": args.max_pages,
+                "crawl_delay_ms": 1000 * args.crawl_delay,
+                "bfs": crawl(base, os.path.join(directory, "bfs"), fresh, args.max_pages, respect_robots=False, use_sitemaps=False),
+                "scheduled": crawl(base, os.path.join(directory, "scheduled"), fresh, args.max_pages),
+            }
+        finally:
+            server.shutdown()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
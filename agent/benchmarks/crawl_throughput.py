@@ -0,0 +1,142 @@
+"""
+Crawl throughput against a local fixture site: the original sequential
+fetch-parse loop vs. JewelScraper's worker pool.
+
+Generates --pages linked pages in a temporary directory and serves them on
+127.0.0.1 (tests.fixture_site, the scraper tests' fixture), adding --latency seconds to every response (a
+remote site's round trip). Links repeat, and some carry fragments, so both
+crawls see many URLs that point at a page they already have. Both crawls
+fetch up to --max-pages pages, parse them with page_parser and index them
+into a throwaway Chroma store (offline hashing embeddings). The report shows
+pages per second, distinct vs. total page fetches, and the most requests
+the server had in flight at once.
+
+The sequential loop is the one the scraper started from: one blocking
+requests.get at a time, links queued as they are found, everything indexed
+at the end. Its 0.5 s politeness sleep is left out (--polite-delay to put it
+back). The scraper runs at its shipped per-host rate limit (10 requests/s)
+unless --per-host-rate says otherwise; on a single host that limit, not the
+worker pool, caps its throughput. --per-host-rate 0 shows the pool alone.
+
+    cd agent && python -m benchmarks.crawl_throughput --pages 60 --latency 0.1
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import argparse
+import tempfile
+import contextlib
+from urllib.parse import urljoin
+
+import requests
+from langchain_core.documents import Document
+
+import embeddings
+import image_table
+import index_version
+import insert_data_db
+from embeddings import EmbeddingService, HashingEmbeddings
+from image_table import ImageTable
+from page_parser import parse_page
+from scraper import JewelScraper
+from tests.fixture_site import FixtureHandler, scraper_for, serve, write_site
+
+# The rate JewelScraper ships with
+DEFAULT_PER_HOST_RATE = inspect.signature(JewelScraper).parameters["per_host_rate"].default
+
+
+def use_storage(directory):
+    """Points the index, image table and index version at `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    index_version.INDEX_VERSION_PATH = os.path.join(directory, "index_version")
+    insert_data_db.open_store(os.path.join(directory, "chroma"))
+    image_table._image_table = ImageTable(os.path.join(directory, "images.sqlite3"))
+
+
+def sequential_crawl(base, max_pages, max_depth, polite_delay):
+    """The original loop: fetch, parse and queue links one page at a time."""
+    start_url = f"{base}/"
+    queue, visited, documents = [(start_url, 0)], set(), []
+    while queue and len(visited) < max_pages:
+        url, depth = queue.pop(0)
+        if url in visited or depth > max_depth:
+            continue
+        response = requests.get(url, timeout=10)
+        if response.status_code != 200:
+            continue
+        visited.add(url)
+        page = parse_page(url, response.text)
+        documents += [Document(page_content=text, metadata={"source": url, "chunk_index": i}) for i, text, _ in page.chunks]
+        if depth < max_depth:
+            for link in page.links:
+                next_url = urljoin(url, link).split("#")[0]
+                if next_url.startswith(start_url) and next_url not in visited:
+                    queue.append((next_url, depth + 1))
+        time.sleep(polite_delay)
+    insert_data_db.insert_data(documents, dedup=False)
+    return len(visited)
+
+
+def measure(crawl):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        pages = crawl()
+    elapsed = time.perf_counter() - started
+    fetched = FixtureHandler.page_requests()
+    return {
+        "pages": pages,
+        "page_fetches": len(fetched),
+        "distinct_page_fetches": len(set(fetched)),
+        "max_in_flight": FixtureHandler.max_in_flight,
+        "seconds": round(elapsed, 2),
+        "pages_per_second": round(pages / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=60, help="Pages on the fixture site")
+    parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument("--max-depth", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds added to every response")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--per-host-concurrency", type=int, default=4)
+    parser.add_argument("--per-host-rate", type=float, default=DEFAULT_PER_HOST_RATE, help="Requests started per second per host (the scraper's default); 0 turns the limiter off")
+    parser.add_argument("--polite-delay", type=float, default=0.0, help="Sleep after each page in the sequential loop (it used 0.5)")
+    args = parser.parse_args()
+
+    embeddings._service = EmbeddingService(HashingEmbeddings(), cache_path=None)
+    with tempfile.TemporaryDirectory() as directory:
+        site = os.path.join(directory, "site")
+        write_site(site, args.pages)
+        report = {"config": vars(args)}
+
+        with serve(site, args.latency) as base:
+            use_storage(os.path.join(directory, "sequential"))
+            report["sequential"] = measure(lambda: sequential_crawl(base, args.max_pages, args.max_depth, args.polite_delay))
+
+        with serve(site, args.latency) as base:
+            storage = os.path.join(directory, "concurrent")
+            use_storage(storage)
+            scraper = scraper_for(
+                base, storage, max_depth=args.max_depth, max_pages=args.max_pages, concurrency=args.concurrency,
+                per_host_concurrency=args.per_host_concurrency, per_host_rate=args.per_host_rate,
+            )
+
+            def crawl():
+                scraper.scrape()
+                return scraper.pages_scraped_this_session
+
+            report["concurrent"] = measure(crawl)
+
+    report["speedup"] = round(report["sequential"]["seconds"] / report["concurrent"]["seconds"], 2)
+    report["per_host_rate"] = f"{args.per_host_rate:g} requests/s" if args.per_host_rate else "off (no per-host rate limit)"
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
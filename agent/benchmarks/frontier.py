@@ -0,0 +1,107 @@
+"""
+Frontier benchmark: the old list/pop(0) BFS queue vs. frontier.Frontier on a
+synthetic, densely linked site graph. No network involved.
+
+    cd agent && python -m benchmarks.frontier --pages 10000 --links 16
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from frontier import Frontier
+
+BASE = "https://jewels.example.com"
+
+
+def build_site(pages, links, seed=7):
+    """Every page links to `links` random pages, with the URL variants a real
+    site produces (trailing slash, shuffled query args, mixed-case host)."""
+    rng = random.Random(seed)
+    variants = [
+        lambda n: f"{BASE}/p/{n}",
+        lambda n: f"{BASE}/p/{n}/",
+        lambda n: f"https://JEWELS.example.com/p/{n}",
+        lambda n: f"{BASE}/p/{n}?a=1&b=2",
+        lambda n: f"{BASE}/p/{n}?b=2&a=1",
+    ]
+    graph = {}
+    for n in range(pages):
+        graph[n] = [rng.choice(variants)(rng.randrange(pages)) for _ in range(links)]
+    return graph
+
+
+def page_id(url):
+    return int(url.split("/p/")[1].split("/")[0].split("?")[0])
+
+
+def crawl_legacy(graph):
+    """The pre-Frontier loop: list queue, visited checked at enqueue only."""
+    visited = set()
+    queue = [(f"{BASE}/p/0", 0)]
+    peak = 1
+    while queue:
+        url, depth = queue.pop(0)
+        if url in visited:
+            continue
+        visited.add(url)
+        for next_url in graph[page_id(url)]:
+            if next_url not in visited:
+                queue.append((next_url, depth + 1))
+        peak = max(peak, len(queue))
+    return len(visited), peak
+
+
+def crawl_frontier(graph):
+    frontier = Frontier()
+    frontier.push(f"{BASE}/p/0", 0)
+    fetched = 0
+    peak = 1
+    while frontier:
+        url, depth = frontier.pop()
+        fetched += 1
+        for next_url in graph[page_id(url)]:
+            frontier.push(next_url, depth + 1)
+        peak = max(peak, len(frontier))
+    return fetched, peak
+
+
+def measure(fn, graph):
+    # Time and memory are measured in separate runs; tracemalloc slows down
+    # allocation-heavy code too much to trust its wall-clock numbers.
+    started = time.perf_counter()
+    fetched, peak_queue = fn(graph)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn(graph)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "fetches": fetched,
+        "peak_queue_len": peak_queue,
+        "peak_alloc_kb": round(peak_bytes / 1024),
+        "seconds": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--links", type=int, default=16)
+    args = parser.parse_args()
+
+    graph = build_site(args.pages, args.links)
+    report = {
+        "pages": args.pages,
+        "links_per_page": args.links,
+        "legacy": measure(crawl_legacy, graph),
+        "frontier": measure(crawl_frontier, graph),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Prompt growth over a long session, with and without history compaction.
+
+Builds a synthetic conversation where every turn searches the knowledge base
+and renders a few cards (the shape the agent prompt asks for), then reports
+the approximate tokens of message history sent on the first model call of
+each turn.
+
+    cd agent && python -m benchmarks.history_tokens --turns 30 --cards 4
+"""
+
+import sys
+import json
+import argparse
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from history_compaction import compact_history
+
+
+def search_result(turn):
+    return json.dumps([
+        {
+            "content": f"Result {i} for turn {turn}. " + "Knowledge base paragraph about the platform. " * 12,
+            "source": f"https://example.com/docs/page-{turn}-{i}",
+            "images": [f"https://example.com/img/{turn}-{i}-{j}.png" for j in range(5)],
+        }
+        for i in range(3)
+    ], indent=2)
+
+
+def card(turn, i):
+    return {
+        "id": f"card-{turn}-{i}",
+        "title": f"Card {i} of turn {turn}",
+        "content": [
+            {"type": "markdown", "content": "## Heading\n\n" + "Some **rich** card copy with details. " * 10},
+            {"type": "flashcards", "items": [{"title": f"Item {n}", "description": "Short description.", "icon": "⚡"} for n in range(4)]},
+            {"type": "image", "url": f"https://example.com/img/{turn}-{i}.png", "alt": "Illustration"},
+        ],
+        "design": {"themeColor": "#7C3AED", "backgroundColor": "linear-gradient(135deg, #667eea 0%, #764ba2 100%)"},
+        "dimensions": {"width": 320, "height": "auto"},
+    }
+
+
+def turn_messages(turn, cards):
+    search_id = f"search-{turn}"
+    messages = [
+        HumanMessage(content=f"Question number {turn}: show me something about topic {turn}"),
+        AIMessage(content="", tool_calls=[{"id": search_id, "name": "search_knowledge_base", "args": {"query": f"topic {turn}"}}]),
+        ToolMessage(content=search_result(turn), tool_call_id=search_id),
+    ]
+    calls = [{"id": f"render-{turn}-{i}", "name": "render_ui", "args": card(turn, i)} for i in range(cards)]
+    messages.append(AIMessage(content="", tool_calls=calls))
+    messages += [ToolMessage(content=f"UI card '{call['args']['title']}' rendered.", tool_call_id=call["id"]) for call in calls]
+    messages.append(AIMessage(content=f"I've designed {cards} cards about topic {turn}!"))
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--cards", type=int, default=4)
+    args = parser.parse_args()
+
+    history, rows = [], []
+    for turn in range(1, args.turns + 1):
+        messages = turn_messages(turn, args.cards)
+        history += messages[:1]
+        rows.append({
+            "turn": turn,
+            "full_tokens": count_tokens_approximately(history),
+            "compacted_tokens": count_tokens_approximately(compact_history(history)),
+        })
+        history += messages[1:]
+
+    full = sum(row["full_tokens"] for row in rows)
+    compacted = sum(row["compacted_tokens"] for row in rows)
+    report = {
+        "turns": args.turns,
+        "cards_per_turn": args.cards,
+        "per_turn": rows,
+        "total": {"full": full, "compacted": compacted, "saved_pct": round(100 * (1 - compacted / full), 1)},
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Cold-start benchmark for the sample_agent graph.
+
+Imports main.py in fresh interpreters and reports the median wall time, both
+from scratch and on top of the modules the LangGraph server has already
+loaded before it imports a graph (langchain, copilotkit, the OpenAI client).
+Also lists which heavy retrieval modules got imported: with lazy vector-store
+initialization there should be none.
+
+    cd agent && python -m benchmarks.import_time --runs 5
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import sys, time, json
+{preload}
+started = time.perf_counter()
+import main
+main.graph
+elapsed = time.perf_counter() - started
+heavy = [m for m in ("chromadb", "langchain_chroma", "numpy") if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+SERVER_PRELOAD = "import langgraph.graph, langchain.agents, copilotkit, langchain_openai"
+
+
+def probe(preload):
+    env = dict(os.environ)
+    # The chat model is never called, but constructing it needs a key
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    env.pop("RETRIEVAL_WARMUP", None)
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(preload=preload)],
+        cwd=AGENT_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(preload, runs):
+    results = [probe(preload) for _ in range(runs)]
+    return {
+        "median_s": round(statistics.median(r["seconds"] for r in results), 3),
+        "min_s": round(min(r["seconds"] for r in results), 3),
+        "heavy_modules": results[-1]["heavy_modules"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    report = {
+        "runs": args.runs,
+        "cold_import": measure("", args.runs),
+        "import_in_server": measure(SERVER_PRELOAD, args.runs),
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+What near-duplicate detection saves on a site full of repeated boilerplate.
+
+Generates --pages pages that each have their own product copy plus
+--boilerplate blocks drawn from a small pool of promo banners, legal text
+and "about us" teasers. Some copies vary slightly (a date, a discount code),
+as they do on real sites. The pages go through page_parser. The chunks are
+then indexed twice into throwaway Chroma stores (offline hashing
+embeddings): once as they are, and once through NearDuplicateFilter.
+The report shows:
+
+- chunks embedded and estimated embedding tokens
+- on-disk index size
+- filter cost per chunk
+- crowding: how many of the top --k results for boilerplate queries are
+  distinct texts
+
+    cd agent && python -m benchmarks.near_dup --pages 200 --boilerplate 3
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from embeddings import HashingEmbeddings
+from near_dup import DEDUP_MAX_DISTANCE, NearDuplicateFilter
+from page_parser import parse_page
+
+BASE = "https://jewels.example.com"
+
+BOILERPLATE = [
+    ("Holiday sale", "Our holiday sale is on: every ring, necklace and bracelet is 20% off until {date} with code {code}. "
+     "Free insured shipping on all orders, gift wrapping included, and returns are accepted for 60 days after delivery. "),
+    ("Terms of sale", "All prices include VAT. Items remain our property until paid in full. Custom and engraved pieces "
+     "cannot be returned. Warranty claims require the original certificate of authenticity and proof of purchase. "),
+    ("About us", "Founded in 1962, our family workshop has crafted fine jewelry for three generations. Every stone is "
+     "hand selected by our gemologists and set by master jewelers in our studio downtown. "),
+    ("Newsletter", "Join our newsletter for early access to new collections, private sale invitations and care tips "
+     "for your jewelry. We send at most two emails a month and never share your address. "),
+]
+QUERIES = ["holiday sale discount code", "terms of sale warranty", "family workshop history", "newsletter early access"]
+PRODUCTS = ["ring", "necklace", "bracelet", "earrings", "brooch", "pendant", "anklet", "tiara"]
+METALS = ["gold", "silver", "platinum", "rose gold"]
+STONES = ["diamond", "sapphire", "emerald", "ruby", "opal", "pearl"]
+
+
+def site(pages, boilerplate, rng):
+    for n in range(pages):
+        product = f"{rng.choice(METALS)} {rng.choice(STONES)} {rng.choice(PRODUCTS)}"
+        copy = " ".join(
+            f"The {product} no. {n} is {rng.choice(['hand forged', 'cast', 'engraved', 'polished'])} "
+            f"and weighs {rng.randint(2, 40)} grams, with a {rng.choice(STONES)} accent of {rng.randint(1, 90) / 10} carats."
+            for _ in range(12)
+        )
+        blocks = ""
+        for title, text in rng.sample(BOILERPLATE, boilerplate):
+            # Dates and codes change from page to page
+            text = text.format(date=f"December {rng.choice([24, 31])}", code=rng.choice(["GIFT20", "XMAS20"]))
+            blocks += f"<section><h2>{title}</h2><p>{text * 4}</p></section>"
+        html = f"<html><head><title>{product}</title></head><body><main><h1>{product}</h1><p>{copy}</p>{blocks}</main></body></html>"
+        yield f"{BASE}/p/{n}", html
+
+
+def index(chunks, directory):
+    embeddings = HashingEmbeddings()
+    store = Chroma(persist_directory=directory, embedding_function=embeddings)
+    for start in range(0, len(chunks), 256):
+        store.add_documents(chunks[start:start + 256])
+    size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+    return store, size
+
+
+def crowding(store, k):
+    """Mean number of distinct texts among the top k results of the boilerplate queries."""
+    distinct = [len({doc.page_content for doc in store.similarity_search(query, k=k)}) for query in QUERIES]
+    return round(sum(distinct) / len(distinct), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--boilerplate", type=int, default=3, help="Boilerplate blocks per page")
+    parser.add_argument("--max-distance", type=int, default=DEDUP_MAX_DISTANCE)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    chunks = []
+    for url, html in site(args.pages, args.boilerplate, random.Random(args.seed)):
+        page = parse_page(url, html)
+        chunks += [Document(page_content=text, metadata={"source": url, "chunk_index": i}) for i, text, _ in page.chunks]
+
+    near_duplicates = NearDuplicateFilter(args.max_distance)
+    started = time.perf_counter()
+    kept = near_duplicates.filter(chunks)
+    filter_ms = 1000 * (time.perf_counter() - started)
+
+    report = {"pages": args.pages, "max_distance": args.max_distance, "dedup": near_duplicates.stats()}
+    for name, docs in (("all_chunks", chunks), ("deduplicated", kept)):
+        with tempfile.TemporaryDirectory() as directory:
+            store, size = index(docs, directory)
+            report[name] = {
+                "embedded_chunks": len(docs),
+                "embedding_tokens": sum(len(doc.page_content) for doc in docs) // 4,
+                "index_kb": size // 1024,
+                f"distinct_in_top_{args.k}": crowding(store, args.k),
+            }
+    report["filter_us_per_chunk"] = round(1000 * filter_ms / len(chunks), 1)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
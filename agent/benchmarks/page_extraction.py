@@ -0,0 +1,113 @@
+"""
+Per-page CPU time and peak memory of the scraper's parse stage: the old
+multi-pass extraction vs. page_parser's single traversal.
+
+legacy walks the tree once per find_all / soup(...) / find call, then
+serializes the main content back to HTML for markdownify to parse again.
+single_pass collects everything in one walk and converts the main subtree
+directly. Both run on the same saved pages (--corpus DIR of *.html, or
+generated product pages) and must produce the same title, chunks and
+links. Reports CPU ms per page (process time, and the part of it spent
+after building the tree) and tracemalloc's peak MB per page.
+
+    cd agent && python -m benchmarks.page_extraction --corpus saved_pages/ --rounds 3
+"""
+
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from markdownify import markdownify as md
+
+from page_parser import HTML_PARSER, _splitter, parse_page
+from benchmarks.parse_pool import load_corpus
+
+
+def parse_page_legacy(url, html, parser=HTML_PARSER):
+    """page_parser.parse_page before the single traversal, as (title, chunks, images, links)."""
+    soup = BeautifulSoup(html, parser)
+
+    title = soup.title.string if soup.title else url
+    title = str(title) if title else url
+    images = []
+    for img in soup.find_all('img'):
+        src = img.get('src')
+        if src:
+            images.append(urljoin(url, src))
+
+    for element in soup(['script', 'style', 'nav', 'footer', 'header']):
+        element.decompose()
+
+    main_content = soup.find('main') or soup.body
+    if not main_content:
+        return title, [], images, []
+
+    markdown_text = md(str(main_content), heading_style="ATX")
+    chunks = [(i, chunk) for i, chunk in enumerate(_splitter.split_text(markdown_text)) if chunk.strip()]
+
+    links = []
+    for link in soup.find_all('a'):
+        href = link.get('href')
+        if href:
+            links.append(urljoin(url, href).split('#')[0])
+
+    return title, chunks, images, links
+
+
+def same_output(url, html, parser):
+    page = parse_page(url, html, parser)
+    title, chunks, _, links = parse_page_legacy(url, html, parser)
+    return (page.title, [(i, text) for i, text, _ in page.chunks], page.links) == (title, chunks, links)
+
+
+def cpu_ms(parse, pages, parser, rounds):
+    """Best-of-rounds process time per page, total and for building the tree alone."""
+    def per_page(run):
+        best = float("inf")
+        for _ in range(rounds):
+            started = time.process_time()
+            for url, html in pages:
+                run(url, html)
+            best = min(best, time.process_time() - started)
+        return 1000 * best / len(pages)
+
+    total = per_page(lambda url, html: parse(url, html, parser))
+    tree = per_page(lambda url, html: BeautifulSoup(html, parser))
+    return {"cpu_ms": round(total, 2), "extract_and_markdown_ms": round(total - tree, 2)}
+
+
+def peak_mb(parse, pages, parser):
+    """Mean tracemalloc peak per page: the tree plus everything built from it."""
+    total = 0
+    for url, html in pages:
+        tracemalloc.start()
+        parse(url, html, parser)
+        total += tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return round(total / len(pages) / 2**20, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of saved *.html pages")
+    parser.add_argument("--pages", type=int, default=32, help="Synthetic pages when no corpus is given")
+    parser.add_argument("--parser", default=HTML_PARSER)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args)
+    mismatched = [url for url, html in pages if not same_output(url, html, args.parser)]
+
+    report = {"pages": len(pages), "parser": args.parser, "mismatched_pages": mismatched}
+    for name, parse in (("legacy", parse_page_legacy), ("single_pass", parse_page)):
+        report[name] = {**cpu_ms(parse, pages, args.parser, args.rounds), "peak_mb": peak_mb(parse, pages, args.parser)}
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Wall time of a multi-card answer: one tool call per model response vs all
+independent calls batched into one response and run in parallel.
+
+Drives the real create_agent loop with a scripted model (fixed latency per
+call) and a search tool with a fixed latency, for an answer that needs
+--searches lookups and --cards cards:
+
+- sequential: one search or render_ui call per model response
+- batched:    all searches in one response, all cards in the next
+
+Also checks that the ToolMessages of a batched step come back in tool-call
+order even though the calls finish in reverse order, and runs --sessions
+batched conversations at once through one middleware instance: the limit is
+per thread, so they should take about as long as a single one.
+
+    cd agent && python -m benchmarks.parallel_tools --searches 3 --cards 6 --model-latency 0.5
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# The chat model is never called, but importing main constructs it
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain.agents import create_agent
+from langchain.tools import tool
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from main import render_ui
+from tool_concurrency import ToolConcurrencyMiddleware
+from benchmarks.stub_model import ScriptedChatModel
+
+
+def make_search_tool(latency):
+    @tool
+    async def search_knowledge_base(query: str, delay: float = 0.0):
+        """Stub search with a fixed latency (plus `delay`)."""
+        await asyncio.sleep(latency + delay)
+        return json.dumps({"results": [{"source": "knowledge.txt", "content": [f"About {query}"]}]})
+
+    return search_knowledge_base
+
+
+def search_call(i, searches, latency):
+    # Later calls finish first, so ordering is actually exercised
+    delay = (searches - i) * latency * 0.1
+    return {"id": f"search-{i}", "name": "search_knowledge_base", "args": {"query": f"topic {i}", "delay": delay}}
+
+
+def render_call(i):
+    content = [{"type": "markdown", "content": f"## Card {i}"}]
+    return {"id": f"card-{i}", "name": "render_ui", "args": {"title": f"Card {i}", "content": content}}
+
+
+def script(strategy, searches, cards, latency):
+    steps = []
+    if strategy == "sequential":
+        steps += [[search_call(i, searches, latency)] for i in range(searches)]
+        steps += [[render_call(i)] for i in range(cards)]
+    else:
+        steps.append([search_call(i, searches, latency) for i in range(searches)])
+        steps.append([render_call(i) for i in range(cards)])
+
+    def respond(messages):
+        step = sum(isinstance(message, AIMessage) for message in messages)
+        if step < len(steps):
+            return AIMessage(content="", tool_calls=steps[step])
+        return AIMessage(content=f"I've designed {cards} cards for you!")
+
+    return respond
+
+
+async def run(strategy, args, sessions=1):
+    model = ScriptedChatModel(respond=script(strategy, args.searches, args.cards, args.search_latency), latency=args.model_latency)
+    agent = create_agent(
+        model=model,
+        tools=[make_search_tool(args.search_latency), render_ui],
+        middleware=[ToolConcurrencyMiddleware(args.concurrency)],
+    )
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        agent.ainvoke({"messages": [HumanMessage(content="Show me your services")]}, {"configurable": {"thread_id": f"session-{n}"}})
+        for n in range(sessions)
+    ))
+    elapsed = time.perf_counter() - started
+
+    ordered = True
+    for result in results:
+        tool_ids = [m.tool_call_id for m in result["messages"] if isinstance(m, ToolMessage)]
+        call_ids = [c["id"] for m in result["messages"] if isinstance(m, AIMessage) for c in m.tool_calls]
+        ordered = ordered and tool_ids == call_ids
+    return {
+        "seconds": round(elapsed, 3),
+        "model_calls": model.calls,
+        "tool_calls": len(tool_ids) * sessions,
+        "ordered": ordered,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searches", type=int, default=3)
+    parser.add_argument("--cards", type=int, default=6)
+    parser.add_argument("--model-latency", type=float, default=0.5, help="Seconds per model call")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="Seconds per search call")
+    parser.add_argument("--concurrency", type=int, default=4, help="Tool calls running at once")
+    parser.add_argument("--sessions", type=int, default=4, help="Concurrent conversations for the isolation check")
+    args = parser.parse_args()
+
+    report = {
+        "config": vars(args),
+        "sequential": asyncio.run(run("sequential", args)),
+        "batched": asyncio.run(run("batched", args)),
+        "batched_sessions": asyncio.run(run("batched", args, args.sessions)),
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
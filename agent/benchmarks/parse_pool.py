@@ -0,0 +1,120 @@
+"""
+Parse-stage throughput: in-process vs. the scraper's process pool, per
+BeautifulSoup backend.
+
+Runs page_parser.parse_page over a corpus of saved HTML pages (--corpus DIR
+of *.html files, e.g. pages saved from a crawl) and reports pages/s for:
+
+- inline:       one page after another in this process (the old parse stage)
+- workers=N:    scraper.parse_pool(N), for N = 1, 2, 4, ... up to the core count
+
+and each backend in --parsers that is installed (lxml is optional). Pool
+start-up is excluded: the pool is warmed up before timing. Without --corpus,
+--pages synthetic product pages (large navigation, inline scripts, product
+grids and long descriptions) are generated.
+
+    cd agent && python -m benchmarks.parse_pool --corpus saved_pages/ --rounds 3
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from importlib.util import find_spec
+
+from page_parser import parse_page
+from scraper import parse_pool
+
+BASE = "https://jewels.example.com"
+
+
+def product_page(n):
+    nav = "".join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(80))
+    grid = "".join(
+        f'<div class="card"><a href="/p/{n}-{i}"><img src="/img/{n}-{i}.jpg" alt="Ring {i}"></a>'
+        f'<h3>Ring {i}</h3><span class="price">${100 + i}.00</span><p>Solid gold, hand finished.</p></div>'
+        for i in range(60)
+    )
+    description = "".join(
+        f"<h2>Section {i}</h2><p>{'Our craftsmen set every stone by hand. ' * 12}</p>"
+        f"<ul>{''.join(f'<li>Detail {j} with <strong>bold</strong> text</li>' for j in range(8))}</ul>"
+        for i in range(12)
+    )
+    return (
+        f"<html><head><title>Product {n}</title><style>{'.x{color:red}' * 200}</style>"
+        f"<script>{'var a = 1;' * 500}</script></head><body>"
+        f"<header><nav><ul>{nav}</ul></nav></header>"
+        f"<main><h1>Product {n}</h1>{description}<section>{grid}</section></main>"
+        f"<footer>{'<p>Legal text.</p>' * 30}</footer></body></html>"
+    )
+
+
+def load_corpus(args):
+    if not args.corpus:
+        return [(f"{BASE}/p/{n}", product_page(n)) for n in range(args.pages)]
+    pages = []
+    for name in sorted(os.listdir(args.corpus)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(args.corpus, name), encoding="utf-8", errors="replace") as f:
+                pages.append((f"{BASE}/{name}", f.read()))
+    return pages
+
+
+def worker_counts():
+    counts, n = [], 1
+    while n < (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return counts + [os.cpu_count() or 1]
+
+
+def timed(run, pages, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return {"seconds": round(best, 3), "pages_per_s": round(len(pages) / best, 1)}
+
+
+def bench_parser(pages, parser, rounds):
+    urls = [url for url, _ in pages]
+    htmls = [html for _, html in pages]
+    parsers = [parser] * len(pages)
+
+    report = {"inline": timed(lambda: [parse_page(u, h, parser) for u, h in pages], pages, rounds)}
+    for workers in worker_counts():
+        with parse_pool(workers) as pool:
+            list(pool.map(parse_page, urls[:workers], htmls[:workers], parsers[:workers]))  # warm up
+            result = timed(lambda: list(pool.map(parse_page, urls, htmls, parsers)), pages, rounds)
+        result["speedup"] = round(report["inline"]["seconds"] / result["seconds"], 2)
+        report[f"workers={workers}"] = result
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of saved *.html pages")
+    parser.add_argument("--pages", type=int, default=64, help="Synthetic pages when no corpus is given")
+    parser.add_argument("--parsers", default="html.parser,lxml")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args)
+    report = {
+        "pages": len(pages),
+        "mean_page_kb": round(sum(len(html) for _, html in pages) / len(pages) / 1024, 1),
+        "cores": os.cpu_count(),
+    }
+    for name in args.parsers.split(","):
+        if name == "lxml" and not find_spec("lxml"):
+            report[name] = "not installed"
+            continue
+        report[name] = bench_parser(pages, name, args.rounds)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Per-turn system-prompt size: full AGENT_PROMPT2 vs the assembled prompt.
+
+Replays a set of sample user turns through prompt_builder and reports, for
+each one, whether the layout guide was included and the tokens sent before
+the conversation starts, plus how much of that is the cacheable static
+prefix. Counts use tiktoken's o200k_base (gpt-4.1) when the encoding is
+available and fall back to chars / 4 otherwise.
+
+    cd agent && python -m benchmarks.prompt_tokens
+"""
+
+import sys
+import json
+import argparse
+
+from langchain_core.messages import HumanMessage
+
+from system_prompt import AGENT_PROMPT2
+from prompt_builder import PROMPT_CACHE_MIN_TOKENS, STATIC_PREFIX, build_prompt, needs_layout
+
+SAMPLE_TURNS = [
+    "Hi!",
+    "Show me your services.",
+    "I want to see 3 team members.",
+    "Where are you located?",
+    "Change the theme color to emerald green",
+    "Delete the pricing card",
+    "Thanks, that's great",
+    "What is your refund policy?",
+    "[Form Submitted: Contact Us]\nAction: submit\nData: {\"email\": \"a@b.com\"}",
+    "Clear all cards and show me the pricing plans",
+]
+
+
+def token_counter(encoding):
+    try:
+        import tiktoken
+
+        enc = tiktoken.get_encoding(encoding)
+        return lambda text: len(enc.encode(text)), encoding
+    except Exception:
+        return lambda text: (len(text) + 3) // 4, "chars/4"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--encoding", default="o200k_base")
+    args = parser.parse_args()
+
+    count, counter = token_counter(args.encoding)
+    full = count(AGENT_PROMPT2)
+    prefix = count(STATIC_PREFIX)
+
+    turns = []
+    for text in SAMPLE_TURNS:
+        messages = [HumanMessage(content=text)]
+        assembled = count(build_prompt(messages))
+        turns.append({
+            "turn": text.splitlines()[0][:60],
+            "layout": needs_layout(messages),
+            "tokens": assembled,
+            "saved": full - assembled,
+        })
+
+    sent = sum(turn["tokens"] for turn in turns)
+    report = {
+        "counter": counter,
+        "full_prompt_tokens": full,
+        "static_prefix_tokens": prefix,
+        # Below the minimum, OpenAI caches nothing on turns without the layout guide
+        "static_prefix_cacheable": prefix >= PROMPT_CACHE_MIN_TOKENS,
+        "turns": turns,
+        "total": {
+            "full": full * len(turns),
+            "assembled": sent,
+            "saved_pct": round(100 * (1 - sent / (full * len(turns))), 1),
+            "cacheable_prefix_pct": round(100 * prefix * len(turns) / sent, 1),
+        },
+    }
+    json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+
+
+if __name__ == "__main__":
+    main()
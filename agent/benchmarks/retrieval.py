@@ -0,0 +1,236 @@
+"""
+Retrieval quality and latency harness for search_knowledge_base.
+
+Builds a throwaway index from knowledge.txt plus the scraped-page fixtures
+in benchmarks/corpus (or uses --index-dir), then runs the labeled queries in
+benchmarks/queries.json through the tool for every retrieval mode and
+reports, as JSON:
+- recall@k and MRR (a query counts as evaluated only if its label exists in
+  the index; source-labeled queries are answered by the corpus pages, which
+  include look-alike distractors for most of them)
+- cold and warm sequential latency percentiles (p50/p95/p99)
+- throughput and latency percentiles under N concurrent clients
+
+Runs offline with FAKE_EMBEDDINGS=1 (the default here). Compare runs across
+chunk sizes, cache settings and index builds by diffing the JSON.
+
+    cd agent && python -m benchmarks.retrieval --chunk-size 500 --clients 1 8 32 --out results.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import tempfile
+
+os.environ.setdefault("FAKE_EMBEDDINGS", "1")
+# The chat model is never called, but constructing it needs a key
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_chroma import Chroma
+from langchain_community.document_loaders import TextLoader
+from langchain_core.documents import Document
+from langchain_text_splitters import CharacterTextSplitter
+
+import retrieval
+from embeddings import get_embeddings
+from insert_data_db import assign_chunk_ids
+from page_parser import parse_page
+from search_cache import SearchCache
+from main import search_knowledge_base
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUERIES_PATH = os.path.join(AGENT_DIR, "benchmarks", "queries.json")
+# Saved pages, one <host>/<path>/index.html per URL
+CORPUS_DIR = os.path.join(AGENT_DIR, "benchmarks", "corpus")
+
+
+def corpus_documents():
+    """Chunks the corpus pages the way the scraper does, URL from the file path."""
+    docs = []
+    for directory, _, files in sorted(os.walk(CORPUS_DIR)):
+        if "index.html" not in files:
+            continue
+        path = os.path.relpath(directory, CORPUS_DIR).replace(os.sep, "/")
+        url = f"https://{path}/"
+        with open(os.path.join(directory, "index.html")) as f:
+            page = parse_page(url, f.read())
+        for i, chunk, image_urls in page.chunks:
+            # Legacy URL form, so the run needs no image table
+            metadata = {"source": url, "title": page.title, "chunk_index": i, "image_urls": ",".join(image_urls)}
+            docs.append(Document(page_content=chunk, metadata=metadata))
+    return docs
+
+
+def build_index(chunk_size, chunk_overlap):
+    """Chunks knowledge.txt the way ingest.py does, plus the corpus pages, into a temporary Chroma."""
+    documents = TextLoader(os.path.join(AGENT_DIR, "knowledge.txt")).load()
+    docs = CharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap).split_documents(documents)
+    for i, doc in enumerate(docs):
+        doc.metadata["source"] = "knowledge.txt"
+        doc.metadata["chunk_index"] = i
+    docs += corpus_documents()
+    assign_chunk_ids(docs)
+    store = Chroma(persist_directory=tempfile.mkdtemp(), embedding_function=get_embeddings())
+    store.add_documents(docs, ids=[doc.id for doc in docs])
+    return store
+
+
+def install(store, cache_size, similarity):
+    """Points retrieval (and thereby the tool) at `store` with a fresh cache."""
+    retrieval.vectorstore = store
+    retrieval._lexical_index = None
+    retrieval.search_cache = SearchCache(maxsize=cache_size, similarity_threshold=similarity)
+
+
+def parse_results(output):
+    """[(content, source)] from the tool's JSON output."""
+    data = json.loads(output)
+    if "error" in data:
+        return []
+    return [(content, group["source"]) for group in data["results"] for content in group["content"]]
+
+
+def is_relevant(result, label):
+    content, source = result
+    if "expect" in label:
+        return label["expect"] in content
+    return source == label["source"]
+
+
+def is_answerable(label, store):
+    if "expect" in label:
+        return True
+    return bool(store.get(where={"source": label["source"]}, limit=1, include=[])["ids"])
+
+
+def percentiles(samples):
+    if len(samples) < 2:
+        value = round(samples[0] * 1000, 3) if samples else None
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+async def timed_call(query, mode):
+    started = time.perf_counter()
+    output = await search_knowledge_base.ainvoke({"query": query, "mode": mode})
+    return time.perf_counter() - started, output
+
+
+async def sequential(labels, mode):
+    """One pass over all queries: per-call latencies and tool outputs."""
+    latencies, outputs = [], []
+    for label in labels:
+        latency, output = await timed_call(label["query"], mode)
+        latencies.append(latency)
+        outputs.append(output)
+    return latencies, outputs
+
+
+async def concurrent(labels, mode, clients, calls):
+    """`clients` workers issue `calls` queries in total, round-robin over labels."""
+    pending = list(range(calls))
+    latencies = []
+
+    async def client():
+        while pending:
+            i = pending.pop()
+            latency, _ = await timed_call(labels[i % len(labels)]["query"], mode)
+            latencies.append(latency)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return {"clients": clients, "calls": calls, "throughput_qps": round(calls / elapsed, 1), **percentiles(latencies)}
+
+
+def quality(labels, outputs, answerable, k):
+    hits, reciprocal_ranks, evaluated = 0, [], 0
+    for label, output, ok in zip(labels, outputs, answerable):
+        if not ok:
+            continue
+        evaluated += 1
+        ranks = [rank for rank, result in enumerate(parse_results(output)[:k], start=1) if is_relevant(result, label)]
+        hits += bool(ranks)
+        reciprocal_ranks.append(1.0 / ranks[0] if ranks else 0.0)
+    return {
+        f"recall@{k}": round(hits / evaluated, 4) if evaluated else None,
+        "mrr": round(sum(reciprocal_ranks) / evaluated, 4) if evaluated else None,
+        "evaluated": evaluated,
+        "skipped": len(labels) - evaluated,
+    }
+
+
+async def bench_mode(store, labels, answerable, mode, args):
+    install(store, args.cache_size, args.similarity)
+    cold, outputs = await sequential(labels, mode)
+    warm, _ = await sequential(labels, mode)
+    report = {
+        "quality": quality(labels, outputs, answerable, args.k),
+        "sequential_cold": percentiles(cold),
+        "sequential_warm": percentiles(warm),
+        "concurrent": [],
+    }
+    for clients in args.clients:
+        install(store, args.cache_size, args.similarity)
+        report["concurrent"].append(await concurrent(labels, mode, clients, args.calls))
+    report["cache"] = retrieval.search_cache.stats()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index-dir", help="Benchmark an existing Chroma directory instead of building one")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", default=["hybrid", "vector", "keyword"])
+    parser.add_argument("--clients", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--calls", type=int, default=300, help="Total calls per concurrency level")
+    parser.add_argument("--cache-size", type=int, default=512, help="0 disables the query-result cache")
+    parser.add_argument("--similarity", type=float, default=None, help="Semantic cache threshold")
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if args.index_dir:
+        store = Chroma(persist_directory=args.index_dir, embedding_function=get_embeddings())
+    else:
+        store = build_index(args.chunk_size, args.chunk_overlap)
+
+    with open(QUERIES_PATH) as f:
+        labels = json.load(f)
+    answerable = [is_answerable(label, store) for label in labels]
+
+    report = {
+        "config": {
+            "index": args.index_dir or "knowledge.txt + benchmarks/corpus",
+            "index_chunks": store._collection.count(),
+            "chunk_size": None if args.index_dir else args.chunk_size,
+            "chunk_overlap": None if args.index_dir else args.chunk_overlap,
+            "k": args.k,
+            "embedder": get_embeddings().model,
+            "cache_size": args.cache_size,
+            "similarity": args.similarity,
+            "queries": len(labels),
+        },
+        "modes": {mode: asyncio.run(bench_mode(store, labels, answerable, mode, args)) for mode in args.modes},
+    }
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Load test for search_knowledge_base with a stubbed, slow embedder.
+
+Runs N concurrent "sessions" on one event loop, first through the blocking
+search (what the old sync tool did inside the server loop), then through
+retrieval.asearch, and reports wall time plus the worst event-loop stall seen
+by a heartbeat task.
+
+    cd agent && python -m benchmarks.search_concurrency --sessions 20 --latency 0.1
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+os.environ.setdefault("FAKE_EMBEDDINGS", "1")
+
+from langchain_core.documents import Document
+from langchain_chroma import Chroma
+
+import retrieval
+from embeddings import EmbeddingService, HashingEmbeddings
+
+
+class SlowFakeEmbedding(HashingEmbeddings):
+    """Deterministic vectors after a fixed, network-like delay."""
+
+    def __init__(self, latency=0.1):
+        super().__init__()
+        self.latency = latency
+
+    def embed_query(self, text):
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_query(self, text):
+        await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+
+async def heartbeat(stop, interval=0.01):
+    """Returns the largest delay between scheduled and actual wake-ups."""
+    loop = asyncio.get_running_loop()
+    worst = 0.0
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        worst = max(worst, loop.time() - started - interval)
+    return worst
+
+
+async def run(mode, sessions):
+    if mode == "blocking":
+        async def session(i):
+            return retrieval.search(f"{mode} question {i}")
+    else:
+        async def session(i):
+            return await retrieval.asearch(f"{mode} question {i}")
+
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(heartbeat(stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return {"seconds": round(elapsed, 3), "max_loop_stall_ms": round(await monitor * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub embedding latency in seconds")
+    args = parser.parse_args()
+
+    service = EmbeddingService(SlowFakeEmbedding(latency=args.latency), cache_path=None)
+    store = Chroma(persist_directory=tempfile.mkdtemp(), embedding_function=service)
+    store.add_documents([Document(page_content=f"Knowledge chunk {i}") for i in range(200)])
+    retrieval.embeddings = service
+    retrieval.vectorstore = store
+
+    report = {
+        "sessions": args.sessions,
+        "embed_latency_s": args.latency,
+        "blocking": asyncio.run(run("blocking", args.sessions)),
+        "async": asyncio.run(run("async", args.sessions)),
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
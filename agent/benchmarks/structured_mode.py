@@ -0,0 +1,114 @@
+"""
+Model calls and wall time per UI turn: tool-calling mode vs the opt-in
+structured single-shot mode (AGENT_RESPONSE_MODE=structured).
+
+Both modes run through the real create_agent loop with a scripted model
+(fixed latency per call), for a turn that renders one card with and
+without a knowledge-base search first. Also checks that the structured
+answer comes out as a chat message plus a validated render_ui call.
+
+    cd agent && python -m benchmarks.structured_mode --model-latency 0.8
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# The chat model is never called, but importing main constructs it
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain.agents import create_agent
+from langchain.agents.structured_output import ToolStrategy
+from langchain.tools import tool
+from langchain_core.messages import AIMessage, HumanMessage
+
+from main import render_ui, setThemeColor, delete_card
+from prompt_builder import STATIC_PREFIX
+from structure import AgentOutputSchema
+from structured_mode import OUTPUT_TOOL, StructuredResponseMiddleware
+from benchmarks.stub_model import ScriptedChatModel
+
+CARD = {
+    "id": "services",
+    "title": "Our Services",
+    "content": [
+        {"type": "markdown", "content": "## Our Services\n\nWhat we build for you."},
+        {"type": "flashcards", "items": [{"title": "Dynamic UI", "description": "Cards on demand", "icon": "⚡"}]},
+    ],
+    "design": {"themeColor": "#7C3AED"},
+}
+MESSAGE = "I've designed a card with our services!"
+
+
+@tool
+def search_knowledge_base(query: str):
+    """Stub search."""
+    return json.dumps({"results": [{"source": "knowledge.txt", "content": [f"About {query}"]}]})
+
+
+def script(mode, search):
+    steps = []
+    if search:
+        steps.append(AIMessage(content="", tool_calls=[{"id": "search-1", "name": "search_knowledge_base", "args": {"query": "services"}}]))
+    if mode == "tools":
+        steps.append(AIMessage(content="", tool_calls=[{"id": "card-1", "name": "render_ui", "args": CARD}]))
+        steps.append(AIMessage(content=MESSAGE))
+    else:
+        answer = {"thought": "One card fits.", "response_mode": "ui", "chat_message": MESSAGE, "ui_data": CARD}
+        steps.append(AIMessage(content="", tool_calls=[{"id": "answer-1", "name": OUTPUT_TOOL, "args": answer}]))
+
+    def respond(messages):
+        return steps[sum(isinstance(message, AIMessage) for message in messages)]
+
+    return respond
+
+
+def build(mode, model):
+    tools = [search_knowledge_base, render_ui, setThemeColor, delete_card]
+    if mode == "tools":
+        return create_agent(model=model, tools=tools, system_prompt=STATIC_PREFIX)
+    return create_agent(
+        model=model,
+        tools=tools,
+        middleware=[StructuredResponseMiddleware()],
+        response_format=ToolStrategy(AgentOutputSchema),
+        system_prompt=STATIC_PREFIX,
+    )
+
+
+async def run(mode, search, latency):
+    model = ScriptedChatModel(respond=script(mode, search), latency=latency)
+    agent = build(mode, model)
+    started = time.perf_counter()
+    result = await agent.ainvoke({"messages": [HumanMessage(content="Show me your services")]})
+    elapsed = time.perf_counter() - started
+
+    answer = next(m for m in reversed(result["messages"]) if isinstance(m, AIMessage) and m.content)
+    rendered = [c for m in result["messages"] if isinstance(m, AIMessage) for c in m.tool_calls if c["name"] == "render_ui"]
+    return {
+        "model_calls": model.calls,
+        "seconds": round(elapsed, 3),
+        "chat_message_ok": answer.content == MESSAGE,
+        "card_ok": len(rendered) == 1 and rendered[0]["args"]["title"] == CARD["title"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-latency", type=float, default=0.8, help="Seconds per model call")
+    args = parser.parse_args()
+
+    report = {"model_latency_s": args.model_latency}
+    for search in (False, True):
+        report["with_search" if search else "card_only"] = {
+            mode: asyncio.run(run(mode, search, args.model_latency)) for mode in ("tools", "structured")
+        }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+A scripted chat model for running the real agent graph offline.
+
+`respond(messages)` decides the next AIMessage from the conversation so far,
+and every call sleeps `latency` seconds to stand in for the provider's
+round trip. Calls are counted in `calls`.
+
+With streaming=True the async path streams the answer instead: `latency`
+becomes the time to first token, and text and tool-call arguments arrive in
+`chunk_chars` pieces every `token_latency` seconds.
+"""
+
+import json
+import time
+import asyncio
+from typing import Any, Callable
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class ScriptedChatModel(BaseChatModel):
+    respond: Callable[[list], Any]
+    latency: float = 0.0
+    streaming: bool = False
+    chunk_chars: int = 16
+    token_latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _result(self, messages):
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=self.respond(messages))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        message = self.respond(messages)
+        await asyncio.sleep(self.latency)
+
+        pieces = []
+        for start in range(0, len(message.content), self.chunk_chars):
+            pieces.append(AIMessageChunk(content=message.content[start:start + self.chunk_chars]))
+        for index, call in enumerate(message.tool_calls):
+            args = json.dumps(call["args"])
+            for start in range(0, len(args), self.chunk_chars):
+                first = start == 0
+                pieces.append(AIMessageChunk(content="", tool_call_chunks=[{
+                    "index": index,
+                    "id": call["id"] if first else None,
+                    "name": call["name"] if first else None,
+                    "args": args[start:start + self.chunk_chars],
+                }]))
+
+        for piece in pieces or [AIMessageChunk(content="")]:
+            chunk = ChatGenerationChunk(message=piece)
+            if run_manager:
+                await run_manager.on_llm_new_token(piece.content, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(self.token_latency)
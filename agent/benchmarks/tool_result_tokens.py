@@ -0,0 +1,92 @@
+"""
+Tokens per search_knowledge_base call: the old indented encoding vs the
+compact one (results grouped by source so each URL appears once, no
+whitespace, trimmed content without inline images, link targets, blank lines
+or bold markers).
+
+Runs every query in benchmarks/queries.json against the retrieval benchmark's
+throwaway index (knowledge.txt plus the saved pages in benchmarks/corpus), or
+against a scraped index with --index-dir, and encodes the same results both
+ways.
+
+    cd agent && python -m benchmarks.tool_result_tokens --index-dir chroma_db --max-tokens 200
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import statistics
+
+os.environ.setdefault("FAKE_EMBEDDINGS", "1")
+# The chat model is never called, but constructing it needs a key
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_chroma import Chroma
+
+import retrieval
+from embeddings import get_embeddings
+from main import SEARCH_RESULT_TOKENS, encode_results
+from benchmarks.retrieval import QUERIES_PATH, build_index, install
+from benchmarks.prompt_tokens import token_counter
+
+
+def legacy_encoding(results):
+    """What search_knowledge_base returned before the compact format."""
+    return json.dumps([
+        {
+            "content": doc.page_content,
+            "source": doc.metadata.get("source", "Unknown"),
+            "images": doc.metadata.get("image_urls", "").split(",") if doc.metadata.get("image_urls") else [],
+        }
+        for doc in results
+    ], indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index-dir", help="Use an existing Chroma directory instead of the benchmark corpus")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=SEARCH_RESULT_TOKENS, help="Per-result content budget")
+    parser.add_argument("--encoding", default="o200k_base")
+    args = parser.parse_args()
+
+    if args.index_dir:
+        store = Chroma(persist_directory=args.index_dir, embedding_function=get_embeddings())
+    else:
+        store = build_index(500, 50)
+    install(store, cache_size=0, similarity=None)
+    count, counter = token_counter(args.encoding)
+
+    with open(QUERIES_PATH) as f:
+        queries = [label["query"] for label in json.load(f)]
+
+    rows = []
+    for query in queries:
+        results = asyncio.run(retrieval.asearch(query, k=args.k))
+        before = count(legacy_encoding(results))
+        after = count(encode_results(results, args.max_tokens))
+        rows.append({"query": query, "legacy_tokens": before, "compact_tokens": after, "saved": before - after})
+
+    legacy = sum(row["legacy_tokens"] for row in rows)
+    compact = sum(row["compact_tokens"] for row in rows)
+    report = {
+        "counter": counter,
+        "index": args.index_dir or "knowledge.txt + benchmarks/corpus",
+        "max_tokens_per_result": args.max_tokens,
+        "per_query": rows,
+        "total": {
+            "calls": len(rows),
+            "legacy_tokens": legacy,
+            "compact_tokens": compact,
+            "mean_saved_per_call": round(statistics.mean(row["saved"] for row in rows), 1),
+            "saved_pct": round(100 * (1 - compact / legacy), 1) if legacy else None,
+        },
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
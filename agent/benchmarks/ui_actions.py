@@ -0,0 +1,81 @@
+"""
+Round trips saved by ending the turn right after a pure UI action.
+
+Runs a setThemeColor turn and a delete_card turn through the real
+create_agent loop with a scripted model (fixed latency per call), once with
+the tools as defined in main.py (return_direct) and once with copies that
+hand the result back to the model, and reports model calls and wall time
+per action.
+
+    cd agent && python -m benchmarks.ui_actions --model-latency 0.8
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# The chat model is never called, but importing main constructs it
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain.agents import create_agent
+from langchain_core.messages import AIMessage, HumanMessage
+
+from main import render_ui, setThemeColor, delete_card
+from benchmarks.stub_model import ScriptedChatModel
+
+ACTIONS = {
+    "setThemeColor": ("Make the theme emerald", {"themeColor": "#10B981"}),
+    "delete_card": ("Close the pricing card", {"title": "Pricing"}),
+}
+
+
+def respond_with(name, args):
+    def respond(messages):
+        if not any(isinstance(message, AIMessage) for message in messages):
+            return AIMessage(content="", tool_calls=[{"id": "action-1", "name": name, "args": args}])
+        return AIMessage(content="Done!")
+
+    return respond
+
+
+async def run(name, fast_path, latency, runs):
+    prompt, args = ACTIONS[name]
+    tools = [render_ui, setThemeColor, delete_card]
+    if not fast_path:
+        tools = [t.model_copy(update={"return_direct": False}) for t in tools]
+
+    timings, calls = [], 0
+    for _ in range(runs):
+        model = ScriptedChatModel(respond=respond_with(name, args), latency=latency)
+        agent = create_agent(model=model, tools=tools)
+        started = time.perf_counter()
+        await agent.ainvoke({"messages": [HumanMessage(content=prompt)]})
+        timings.append(time.perf_counter() - started)
+        calls = model.calls
+    return {"model_calls": calls, "mean_ms": round(1000 * sum(timings) / len(timings), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-latency", type=float, default=0.8, help="Seconds per model call")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    report = {"model_latency_s": args.model_latency}
+    for name in ACTIONS:
+        before = asyncio.run(run(name, False, args.model_latency, args.runs))
+        after = asyncio.run(run(name, True, args.model_latency, args.runs))
+        report[name] = {
+            "round_trip": before,
+            "fast_path": after,
+            "saved_ms": round(before["mean_ms"] - after["mean_ms"], 1),
+        }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
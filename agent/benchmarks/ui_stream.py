@@ -0,0 +1,99 @@
+"""
+Time until a big card first shows up: streamed partial cards vs waiting for
+the complete render_ui arguments.
+
+A scripted, streaming model writes one render_ui call with --blocks content
+blocks (--chunk-chars characters every --token-latency seconds) through the
+real create_agent loop with UIStreamMiddleware. The report compares when
+the frontend could first draw the card from the streamed ui_stream state
+against when the render_ui arguments are complete (all the frontend had
+before), plus the number of intermediate updates.
+
+    cd agent && python -m benchmarks.ui_stream --blocks 12 --token-latency 0.02
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# The chat model is never called, but importing main constructs it
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain.agents import create_agent
+from langchain_core.messages import AIMessage, HumanMessage
+
+from main import render_ui
+from ui_stream import EMIT_STATE_EVENT, UIStreamMiddleware
+from benchmarks.stub_model import ScriptedChatModel
+
+
+def big_card(blocks):
+    content = []
+    for i in range(blocks):
+        if i % 3 == 0:
+            content.append({"type": "markdown", "content": f"### Section {i}\n\n" + "Details about this part of the offer. " * 4})
+        elif i % 3 == 1:
+            content.append({"type": "flashcards", "items": [{"title": f"Item {n}", "description": "Short description.", "icon": "⚡"} for n in range(4)]})
+        else:
+            content.append({"type": "image", "url": f"https://example.com/img/{i}.png", "alt": f"Illustration {i}"})
+    return {"id": "services", "title": "Our Services", "content": content, "design": {"themeColor": "#7C3AED"}}
+
+
+def respond_with(card):
+    def respond(messages):
+        if not any(isinstance(message, AIMessage) for message in messages):
+            return AIMessage(content="", tool_calls=[{"id": "card-1", "name": "render_ui", "args": card}])
+        return AIMessage(content="Here are our services!")
+
+    return respond
+
+
+async def run(args):
+    model = ScriptedChatModel(
+        respond=respond_with(big_card(args.blocks)),
+        latency=args.first_token,
+        streaming=True,
+        chunk_chars=args.chunk_chars,
+        token_latency=args.token_latency,
+    )
+    agent = create_agent(model=model, tools=[render_ui], middleware=[UIStreamMiddleware()])
+
+    started = time.perf_counter()
+    updates, args_complete = [], None
+    async for event in agent.astream_events({"messages": [HumanMessage(content="Show me your services")]}, version="v2"):
+        if event["event"] == "on_custom_event" and event["name"] == EMIT_STATE_EVENT:
+            card = event["data"]["ui_stream"].get("services")
+            if card is None:
+                continue  # The closing snapshot that clears ui_stream
+            updates.append((time.perf_counter() - started, len(card["content"])))
+        elif event["event"] == "on_chat_model_end" and args_complete is None:
+            args_complete = time.perf_counter() - started
+
+    first_block = next((t for t, blocks in updates if blocks), None)
+    return {
+        "blocks": args.blocks,
+        "updates": len(updates),
+        "card_frame_ms": round(updates[0][0] * 1000, 1) if updates else None,
+        "first_block_ms": round(first_block * 1000, 1) if first_block else None,
+        "last_streamed_blocks": updates[-1][1] if updates else 0,
+        "full_args_ms": round(args_complete * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=12)
+    parser.add_argument("--first-token", type=float, default=0.4, help="Seconds to first token")
+    parser.add_argument("--chunk-chars", type=int, default=16)
+    parser.add_argument("--token-latency", type=float, default=0.02, help="Seconds between chunks")
+    args = parser.parse_args()
+
+    json.dump(asyncio.run(run(args)), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
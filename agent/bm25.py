@@ -0,0 +1,93 @@
+"""
+In-process inverted index with Okapi BM25 scoring.
+
+Built from the same chunks that ingest.py and scraper.py store in Chroma, so
+the lexical and the vector path rank exactly the same documents. Queries are
+pure Python dictionary lookups: no network, well under a millisecond on a
+catalog-sized index.
+"""
+
+import re
+import math
+import heapq
+from collections import Counter
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_SPLIT = re.compile(r"[-_./]")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by do does for from has have how i in is it its "
+    "me my of on or our the this to us was we what when where which who why "
+    "will with you your".split()
+)
+
+
+def tokenize(text):
+    """
+    Lowercased word tokens. SKU-like compounds ('AB-1234', 'v2.1') are kept
+    whole and also split into their parts, so either form matches.
+    """
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in _SPLIT.split(token) if part and part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self.postings = {}  # term -> [(doc index, term frequency)]
+        lengths = []
+        for i, doc in enumerate(self.documents):
+            counts = Counter(tokenize(doc.page_content))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((i, tf))
+
+        n = len(self.documents)
+        avg_length = (sum(lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self.postings.items()
+        }
+        # Precomputed length normalisation: k1 * (1 - b + b * len / avg)
+        self._norms = [k1 * (1 - b + b * length / avg_length) if avg_length else k1 for length in lengths]
+
+    def __len__(self):
+        return len(self.documents)
+
+    def search(self, query, k=3):
+        """Returns up to k (Document, score) pairs, best first."""
+        scores = {}
+        k1 = self.k1
+        norms = self._norms
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = self.idf[term]
+            for i, tf in posting:
+                scores[i] = scores.get(i, 0.0) + idf * tf * (k1 + 1) / (tf + norms[i])
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.documents[i], score) for i, score in best]
+
+
+def reciprocal_rank_fusion(result_lists, k=60):
+    """
+    Merges ranked Document lists: score(d) = sum(1 / (k + rank)). Documents
+    are matched by id (falling back to their text).
+    """
+    scores = {}
+    docs = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
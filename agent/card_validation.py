@@ -0,0 +1,90 @@
+"""
+Catches malformed render_ui cards before they reach the frontend.
+
+The frontend renders render_ui calls itself, so a bad content block used to
+show up as a broken card and cost another turn to fix. This middleware
+validates the content of every render_ui / show_dynamic_card call in a model
+response against the per-type block models in structure.py. If any block is
+invalid, the response is not committed. Instead the model sees its own
+attempt plus tool results listing the problems, and is asked again, up to
+RENDER_UI_RETRIES times. Only the corrected response enters the history.
+"""
+
+import os
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, ToolMessage
+
+from structure import CARD_TOOLS, content_errors
+
+RENDER_UI_RETRIES = int(os.getenv("RENDER_UI_RETRIES", "2"))
+
+
+def rejection_message(title, errors):
+    """The tool result that tells the model which blocks to fix."""
+    lines = "\n".join(f"- {error}" for error in errors)
+    return f"UI card '{title}' was NOT rendered. Fix these content blocks and call render_ui again:\n{lines}"
+
+
+def card_problems(message):
+    """{tool call id: errors} for the invalid card calls in an AIMessage."""
+    problems = {}
+    for call in message.tool_calls:
+        if call["name"] in CARD_TOOLS:
+            errors = content_errors(call["args"].get("content"))
+            if errors:
+                problems[call["id"]] = errors
+    return problems
+
+
+def _last_ai_message(response):
+    for message in reversed(response.result):
+        if isinstance(message, AIMessage):
+            return message
+    return None
+
+
+class CardValidationMiddleware(AgentMiddleware):
+    """Re-asks the model when a render_ui call has invalid content blocks."""
+
+    def __init__(self, max_retries=RENDER_UI_RETRIES):
+        super().__init__()
+        self.max_retries = max_retries
+
+    def _retry_request(self, request, response):
+        message = _last_ai_message(response)
+        if message is None:
+            return None
+        problems = card_problems(message)
+        if not problems:
+            return None
+
+        print(f"🧱 Invalid render_ui blocks, asking the model to fix {len(problems)} card(s)")
+        results = []
+        for call in message.tool_calls:
+            if call["id"] in problems:
+                content = rejection_message(call["args"].get("title", ""), problems[call["id"]])
+            else:
+                content = "Not executed: repeat this call together with the fixed cards."
+            results.append(ToolMessage(content=content, tool_call_id=call["id"], name=call["name"]))
+        return request.override(messages=[*request.messages, message, *results])
+
+    def wrap_model_call(self, request, handler):
+        response = handler(request)
+        for _ in range(self.max_retries):
+            retry = self._retry_request(request, response)
+            if retry is None:
+                break
+            request = retry
+            response = handler(request)
+        return response
+
+    async def awrap_model_call(self, request, handler):
+        response = await handler(request)
+        for _ in range(self.max_retries):
+            retry = self._retry_request(request, response)
+            if retry is None:
+                break
+            request = retry
+            response = await handler(request)
+        return response
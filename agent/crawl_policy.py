@@ -0,0 +1,117 @@
+"""
+What the scraper may fetch, and in which order.
+
+- robots.txt: parse_robots() turns a robots.txt response into a stdlib
+  RobotFileParser. The scraper skips disallowed URLs, and a Crawl-delay
+  (whole seconds, as RobotFileParser reads it) becomes the host's minimum
+  interval between requests. As with
+  RobotFileParser.read(), 401/403 disallow everything, other 4xx allow
+  everything, and a 5xx or unreachable robots.txt disallows the host.
+- sitemaps: parse_sitemap() reads <urlset> entries (loc, lastmod, priority)
+  and the child sitemaps of a <sitemapindex>, gzipped or not.
+- url_priority(): the score PriorityFrontier orders the crawl by, so the page
+  budget goes to fresh, relevant pages before listing and utility pages.
+"""
+
+import os
+import re
+import gzip
+import math
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+USER_AGENT = os.getenv("SCRAPER_USER_AGENT", "JewelScraper/1.0")
+
+# Freshness bonus halves every this many days since <lastmod>
+FRESHNESS_HALF_LIFE_DAYS = float(os.getenv("SCRAPER_FRESHNESS_HALF_LIFE_DAYS", "30"))
+# Paths worth the budget first, and paths that rarely hold new content
+HIGH_VALUE_PATHS = re.compile(r"/(products?|shop|collections?|items?|catalog|services?)(/|$)", re.IGNORECASE)
+LOW_VALUE_PATHS = re.compile(r"/(tags?|login|logout|account|cart|checkout|search|feed|privacy|terms)(/|$)|[?&](page|sort|filter)=", re.IGNORECASE)
+
+
+class SitemapEntry(NamedTuple):
+    url: str
+    lastmod: Optional[float]  # Unix timestamp
+    priority: Optional[float]  # 0.0 - 1.0
+
+
+def parse_robots(status_code, text):
+    """RobotFileParser for a robots.txt response (status_code None: unreachable)."""
+    robots = RobotFileParser()
+    if status_code is None or status_code >= 500 or status_code in (401, 403):
+        robots.disallow_all = True
+    elif status_code >= 400:
+        robots.allow_all = True
+    else:
+        robots.parse(text.splitlines())
+    return robots
+
+
+def parse_lastmod(value):
+    """Unix timestamp of a W3C datetime ('2024-05-01', '2024-05-01T10:00:00Z'), or None."""
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_sitemap(content):
+    """
+    Returns (entries, child sitemap URLs) of a sitemap or sitemap index.
+    Malformed XML or a corrupt or truncated gzip file yields nothing.
+    """
+    try:
+        if content[:2] == b"\x1f\x8b":
+            content = gzip.decompress(content)
+        root = ElementTree.fromstring(content)
+    except (ElementTree.ParseError, OSError, EOFError):
+        return [], []
+
+    entries, children = [], []
+    for element in root:
+        fields = {_local_name(child.tag): (child.text or "").strip() for child in element}
+        loc = fields.get("loc")
+        if not loc:
+            continue
+        kind = _local_name(element.tag)
+        if kind == "sitemap":
+            children.append(loc)
+        elif kind == "url":
+            try:
+                priority = float(fields["priority"]) if fields.get("priority") else None
+            except ValueError:
+                priority = None
+            entries.append(SitemapEntry(loc, parse_lastmod(fields.get("lastmod")), priority))
+    return entries, children
+
+
+def url_priority(url, depth, lastmod=None, sitemap_priority=None, now=None):
+    """
+    Crawl priority of a URL; higher is fetched first. Starts at -depth, so
+    without other signals the crawl stays breadth-first, then adds:
+
+    - up to 2 for freshness, halving every FRESHNESS_HALF_LIFE_DAYS since lastmod
+    - the sitemap <priority> (0 - 1)
+    - 1 for product-like paths, -2 for tag, cart, login, paging and similar
+    """
+    score = -float(depth)
+    if lastmod is not None:
+        age_days = max(0.0, ((now or time.time()) - lastmod) / 86400)
+        score += 2 * math.pow(0.5, age_days / FRESHNESS_HALF_LIFE_DAYS)
+    if sitemap_priority is not None:
+        score += min(max(sitemap_priority, 0.0), 1.0)
+    if HIGH_VALUE_PATHS.search(url):
+        score += 1
+    if LOW_VALUE_PATHS.search(url):
+        score -= 2
+    return score
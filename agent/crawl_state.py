@@ -0,0 +1,77 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(__file__), "crawl_state.sqlite3")
+
+
+class CrawlState:
+    """
+    Per-URL record of the last successful fetch: validators (ETag,
+    Last-Modified), a hash of the body, when it was fetched and the links it
+    contained. Recrawls use it to send conditional requests and to keep
+    following links of pages that did not change.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,"
+            " content_hash TEXT, fetched_at REAL, links TEXT)"
+        )
+        self._conn.commit()
+
+    def get(self, url):
+        """Returns the stored record for url as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, fetched_at, links FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_hash, fetched_at, links = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "fetched_at": fetched_at,
+            "links": json.loads(links) if links else [],
+        }
+
+    def record(self, url, etag=None, last_modified=None, content_hash=None, links=()):
+        """Stores the result of a full fetch + index of url."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_hash, fetched_at, links)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, time.time(), json.dumps(list(links))),
+            )
+            self._conn.commit()
+
+    def touch(self, url, etag=None, last_modified=None):
+        """Marks url as revalidated now, refreshing validators the server sent."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?,"
+                " etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)"
+                " WHERE url = ?",
+                (time.time(), etag, last_modified, url),
+            )
+            self._conn.commit()
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since headers for a revalidation request."""
+        state = self.get(url)
+        headers = {}
+        if state:
+            if state["etag"]:
+                headers["If-None-Match"] = state["etag"]
+            if state["last_modified"]:
+                headers["If-Modified-Since"] = state["last_modified"]
+        return headers
@@ -0,0 +1,186 @@
+"""
+Shared embedding layer for ingest.py, insert_data_db.py and main.py.
+
+EmbeddingService wraps the real embedder with:
+- batching of embed_documents calls (batch_size texts per request)
+- a persistent SQLite cache keyed by model + sha256 of the text, so
+  re-ingesting unchanged content costs no API calls
+- an in-process LRU for query embeddings
+
+Set FAKE_EMBEDDINGS=1 to swap OpenAI for HashingEmbeddings, a deterministic
+offline embedder whose similarities still follow word overlap.
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from bm25 import tokenize
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), ".embedding_cache.sqlite3")
+FAKE_EMBEDDING_SIZE = 256
+
+
+def _text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent text-hash -> vector store backed by a single SQLite file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, hash))"
+        )
+        self._conn.commit()
+
+    def get_many(self, model, hashes):
+        """Returns {hash: vector} for the hashes that are cached."""
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *chunk],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model, items):
+        """Stores (hash, vector) pairs."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)",
+                [(model, text_hash, array("f", vector).tobytes()) for text_hash, vector in items],
+            )
+            self._conn.commit()
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Offline embedder: feature-hashed bag of words, L2-normalised. No network,
+    fully deterministic, and texts sharing words get similar vectors, which
+    keeps retrieval benchmarks meaningful without an API key.
+    """
+
+    def __init__(self, size=FAKE_EMBEDDING_SIZE):
+        self.size = size
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for token in tokenize(text):
+            digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.size] += 1.0 if digest >> 63 else -1.0
+        norm = sum(value * value for value in vector) ** 0.5
+        return [value / norm for value in vector] if norm else vector
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class EmbeddingService(Embeddings):
+    """
+    Batched, cached drop-in for any langchain Embeddings implementation.
+    """
+
+    def __init__(self, embedder, cache_path=DEFAULT_CACHE_PATH, batch_size=128, query_cache_size=1024):
+        self.embedder = embedder
+        self.model = getattr(embedder, "model", None) or type(embedder).__name__
+        self.cache = EmbeddingCache(cache_path) if cache_path else None
+        self.batch_size = batch_size
+        self.query_cache_size = query_cache_size
+        self._queries = OrderedDict()
+        self._queries_lock = threading.Lock()
+        self.api_calls = 0
+        self.cache_hits = 0
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        hashes = [_text_hash(text) for text in texts]
+        cached = self.cache.get_many(self.model, list(set(hashes))) if self.cache else {}
+        self.cache_hits += sum(1 for text_hash in hashes if text_hash in cached)
+
+        # Embed each distinct missing text once, batch_size texts per request
+        missing = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+        pending = list(missing.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            vectors = self.embedder.embed_documents([text for _, text in batch])
+            self.api_calls += 1
+            fresh = [(text_hash, vector) for (text_hash, _), vector in zip(batch, vectors)]
+            cached.update(fresh)
+            if self.cache:
+                self.cache.put_many(self.model, fresh)
+
+        return [cached[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text):
+        vector = self._cached_query(text)
+        if vector is None:
+            vector = self.embedder.embed_query(text)
+            self._remember_query(text, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        vector = self._cached_query(text)
+        if vector is None:
+            vector = await self.embedder.aembed_query(text)
+            self._remember_query(text, vector)
+        return vector
+
+    def _cached_query(self, text):
+        with self._queries_lock:
+            if text in self._queries:
+                self._queries.move_to_end(text)
+                self.cache_hits += 1
+                return self._queries[text]
+        return None
+
+    def _remember_query(self, text, vector):
+        with self._queries_lock:
+            self.api_calls += 1
+            self._queries[text] = vector
+            if len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_embeddings():
+    """Returns the process-wide EmbeddingService."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            if os.getenv("FAKE_EMBEDDINGS"):
+                embedder = HashingEmbeddings()
+            else:
+                from langchain_openai import OpenAIEmbeddings
+                embedder = OpenAIEmbeddings()
+            _service = EmbeddingService(
+                embedder,
+                batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "128")),
+            )
+        return _service
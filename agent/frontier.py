@@ -0,0 +1,89 @@
+import heapq
+import itertools
+from collections import deque
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+@lru_cache(maxsize=65536)
+def normalize_url(url):
+    """
+    Canonical form of a URL used as its dedup key: lowercase scheme/host, no
+    default port, no fragment, sorted query parameters and no trailing slash
+    (except for the site root). Only a key: servers may redirect the
+    normalized form (e.g. /about -> /about/), so it is never fetched.
+    Cached, since navigation links repeat on every page.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    if parts.username:
+        host = f"{parts.username}@{host}"
+
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True))) if parts.query else ""
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+class Frontier:
+    """
+    FIFO crawl frontier. Every URL is enqueued at most once per session, as
+    it was discovered; `seen` holds the normalized keys of everything ever
+    queued, independent of whether it has been fetched yet.
+    """
+
+    def __init__(self, seen=None):
+        self._queue = deque()
+        self.seen = set(seen or ())
+
+    def push(self, url, depth):
+        """Queues url at depth. Returns False if it was already seen."""
+        key = normalize_url(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        self._queue.append((url, depth))
+        return True
+
+    def pop(self):
+        """Returns the oldest (url, depth) pair."""
+        return self._queue.popleft()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __bool__(self):
+        return bool(self._queue)
+
+
+class PriorityFrontier(Frontier):
+    """
+    Frontier that pops the highest-priority URL first. Equal priorities come
+    out in FIFO order, so without priorities it crawls like Frontier.
+    """
+
+    def __init__(self, seen=None):
+        super().__init__(seen)
+        self._queue = []  # heap of (-priority, insertion order, url, depth)
+        self._order = itertools.count()
+
+    def push(self, url, depth, priority=0.0):
+        """Queues url at depth with priority. Returns False if it was already seen."""
+        key = normalize_url(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        heapq.heappush(self._queue, (-priority, next(self._order), url, depth))
+        return True
+
+    def pop(self):
+        """Returns the (url, depth) pair with the highest priority."""
+        _, _, url, depth = heapq.heappop(self._queue)
+        return url, depth
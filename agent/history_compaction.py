@@ -0,0 +1,99 @@
+"""
+Keeps the conversation sent to the model small in long sessions.
+
+The graph state still holds the full history; only the copy passed to each
+model call is compacted:
+
+1. The last HISTORY_KEEP_TURNS user turns are sent as they are.
+2. In older turns, render_ui / show_dynamic_card calls keep their id and
+   title but their content, design and dimensions are replaced by a short
+   reference (the card is already on the canvas), and tool results longer
+   than HISTORY_TOOL_RESULT_CHARS are cut down to that length.
+3. If the result is still above HISTORY_TOKEN_BUDGET (approximate tokens),
+   the oldest turns are dropped whole, so a tool call never loses its
+   result. The latest turn is always kept.
+
+With this in place the prompt stops growing after a few turns, so latency
+and cost per turn stay flat instead of growing with the session.
+"""
+
+import os
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from structure import CARD_TOOLS
+
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "2"))
+HISTORY_TOOL_RESULT_CHARS = int(os.getenv("HISTORY_TOOL_RESULT_CHARS", "400"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "12000"))
+
+
+def _turn_starts(messages):
+    return [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+
+def _card_reference(args):
+    content = args.get("content")
+    blocks = len(content) if isinstance(content, list) else 0
+    reference = {key: args[key] for key in ("id", "title") if args.get(key) is not None}
+    reference["content"] = f"[{blocks} content blocks, already rendered]"
+    return reference
+
+
+def _compact_message(message, max_chars):
+    if isinstance(message, AIMessage) and any(call["name"] in CARD_TOOLS for call in message.tool_calls):
+        tool_calls = [
+            {**call, "args": _card_reference(call["args"])} if call["name"] in CARD_TOOLS else call
+            for call in message.tool_calls
+        ]
+        # The provider payload is built from tool_calls; drop the raw copy so
+        # the full arguments can't leak back in
+        additional_kwargs = {k: v for k, v in message.additional_kwargs.items() if k != "tool_calls"}
+        return message.model_copy(update={"tool_calls": tool_calls, "additional_kwargs": additional_kwargs})
+    if isinstance(message, ToolMessage) and isinstance(message.content, str) and len(message.content) > max_chars:
+        trimmed = len(message.content) - max_chars
+        return message.model_copy(update={"content": f"{message.content[:max_chars]}… [{trimmed} chars trimmed]"})
+    return message
+
+
+def compact_history(messages, keep_turns=HISTORY_KEEP_TURNS, max_chars=HISTORY_TOOL_RESULT_CHARS,
+                    token_budget=HISTORY_TOKEN_BUDGET):
+    """Returns a compacted copy of `messages` for the next model call."""
+    starts = _turn_starts(messages)
+    if len(starts) <= keep_turns:
+        return list(messages)
+
+    recent_from = starts[-keep_turns] if keep_turns else len(messages)
+    compacted = [_compact_message(message, max_chars) for message in messages[:recent_from]]
+    compacted += messages[recent_from:]
+
+    # Drop whole turns from the front until the budget fits
+    while count_tokens_approximately(compacted) > token_budget:
+        starts = _turn_starts(compacted)
+        if len(starts) < 2:
+            break
+        compacted = compacted[starts[1]:]
+    return compacted
+
+
+class HistoryCompactionMiddleware(AgentMiddleware):
+    """Sends a compacted copy of the conversation to every model call."""
+
+    def __init__(self, keep_turns=HISTORY_KEEP_TURNS, max_chars=HISTORY_TOOL_RESULT_CHARS,
+                 token_budget=HISTORY_TOKEN_BUDGET):
+        super().__init__()
+        self.keep_turns = keep_turns
+        self.max_chars = max_chars
+        self.token_budget = token_budget
+
+    def _compact(self, request):
+        messages = compact_history(request.messages, self.keep_turns, self.max_chars, self.token_budget)
+        return request.override(messages=messages)
+
+    def wrap_model_call(self, request, handler):
+        return handler(self._compact(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(self._compact(request))
@@ -0,0 +1,74 @@
+"""
+Interned image URLs for the knowledge base.
+
+Chunks don't carry image URLs in their Chroma metadata. Each chunk has the
+short IDs of the images in or near its text ("image_ids", comma-joined),
+and every URL is stored once, here, keyed by that ID. The ID is a hash of
+the URL, so the scraper can compute it anywhere and interning is an
+idempotent insert. search_knowledge_base resolves the IDs of the chunks it
+returns; resolved URLs stay in memory, since an ID always maps to the same
+URL.
+"""
+
+import os
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_IMAGE_TABLE_PATH = os.path.join(os.path.dirname(__file__), "chroma_db", "images.sqlite3")
+
+
+def image_id(url):
+    """Short, stable ID for an image URL."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:12]
+
+
+class ImageTable:
+    """Persistent image ID -> URL table backed by a single SQLite file."""
+
+    def __init__(self, path=DEFAULT_IMAGE_TABLE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS images (id TEXT PRIMARY KEY, url TEXT NOT NULL)")
+        self._conn.commit()
+        self._urls = {}
+
+    def intern(self, urls):
+        """Stores the URLs that are new and returns their IDs, in order."""
+        ids = [image_id(url) for url in urls]
+        new = {id: url for id, url in zip(ids, urls) if id not in self._urls}
+        if new:
+            with self._lock:
+                self._conn.executemany("INSERT OR IGNORE INTO images (id, url) VALUES (?, ?)", new.items())
+                self._conn.commit()
+                self._urls.update(new)
+        return ids
+
+    def urls(self, ids):
+        """Returns {id: url} for the IDs that are stored."""
+        missing = [id for id in set(ids) if id not in self._urls]
+        if missing:
+            with self._lock:
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(f"SELECT id, url FROM images WHERE id IN ({placeholders})", chunk).fetchall()
+                    self._urls.update(rows)
+        return {id: self._urls[id] for id in ids if id in self._urls}
+
+
+_image_table = None
+_init_lock = threading.Lock()
+
+
+def get_image_table():
+    """Opens the shared ImageTable on first use."""
+    global _image_table
+    if _image_table is None:
+        with _init_lock:
+            if _image_table is None:
+                _image_table = ImageTable()
+    return _image_table
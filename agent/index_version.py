@@ -0,0 +1,29 @@
+"""
+Cross-process marker for "the knowledge base changed".
+
+Ingestion (ingest.py / scraper.py, usually a separate process) bumps it once
+per session, after its writes and deletions; the agent's caches compare it on
+lookup and drop their entries when it moved, and the keyword index rebuilds
+in the background. Reading it is one small file read.
+"""
+
+import os
+import time
+
+INDEX_VERSION_PATH = os.path.join(os.path.dirname(__file__), "chroma_db", "index_version")
+
+
+def current():
+    """Returns an opaque token that changes whenever the index is re-ingested."""
+    try:
+        with open(INDEX_VERSION_PATH) as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+def bump():
+    """Marks the index as changed."""
+    os.makedirs(os.path.dirname(INDEX_VERSION_PATH), exist_ok=True)
+    with open(INDEX_VERSION_PATH, "w") as f:
+        f.write(str(time.time_ns()))
@@ -2,8 +2,8 @@ import os
 from dotenv import load_dotenv
 from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import CharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
+from insert_data_db import insert_data, delete_stale_chunks, persist_directory
+import index_version
 
 # Load environment variables (OPENAI_API_KEY)
 load_dotenv()
@@ -18,22 +18,22 @@ def ingest_data():
     text_splitter = CharacterTextSplitter(chunk_size=500, chunk_overlap=50)
     docs = text_splitter.split_documents(documents)
 
-    # 3. Create embeddings and store in Chroma
-    embeddings = OpenAIEmbeddings()
-    persist_directory = os.path.join(os.path.dirname(__file__), "chroma_db")
-    
-    # Initialize Chroma and add documents
+    # Stable, machine-independent source so chunk IDs survive a checkout move
+    for i, doc in enumerate(docs):
+        doc.metadata["source"] = "knowledge.txt"
+        doc.metadata["chunk_index"] = i
+
+    # 3. Upsert by chunk ID: unchanged chunks cost nothing, stale ones are removed
     print(f"Ingesting {len(docs)} chunks into {persist_directory}...")
-    vectorstore = Chroma.from_documents(
-        documents=docs,
-        embedding=embeddings,
-        persist_directory=persist_directory
-    )
-    
+    # Vectors written before chunk IDs existed were keyed by the absolute path
+    if delete_stale_chunks(knowledge_path, keep_ids=set()):
+        index_version.bump()
+    insert_data(docs)
+
     print("Ingestion complete!")
 
 if __name__ == "__main__":
-    if not os.getenv("OPENAI_API_KEY"):
+    if not os.getenv("OPENAI_API_KEY") and not os.getenv("FAKE_EMBEDDINGS"):
         print("ERROR: OPENAI_API_KEY not found in environment.")
     else:
         ingest_data()
@@ -1,28 +1,150 @@
 import os
+import hashlib
+import chromadb
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
+from embeddings import get_embeddings
+import index_version
+from near_dup import NearDuplicateFilter
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def insert_data(documents):
+persist_directory = os.path.join(os.path.dirname(__file__), "chroma_db")
+
+# langchain_chroma's default collection, so existing indexes stay readable
+COLLECTION_NAME = "langchain"
+
+_collection = None
+_vectorstore = None
+
+def open_store(path=persist_directory):
+    """
+    Opens the persistent Chroma store at `path`, replacing the current one.
+    One chromadb client serves both the chromadb collection batches are
+    upserted into and the langchain Chroma wrapper used for everything else.
+    """
+    global _collection, _vectorstore
+    client = chromadb.PersistentClient(path=path)
+    _vectorstore = Chroma(client=client, collection_name=COLLECTION_NAME, embedding_function=get_embeddings())
+    # Same collection; embeddings always come with the upsert, never from Chroma
+    _collection = client.get_collection(COLLECTION_NAME, embedding_function=None)
+    return _vectorstore
+
+def _get_vectorstore():
+    """Opens the persistent ChromaDB vector store once per process."""
+    if _vectorstore is None:
+        open_store()
+    return _vectorstore
+
+def _get_collection():
+    if _collection is None:
+        open_store()
+    return _collection
+
+def chunk_id(source, chunk_index, content):
+    """
+    Deterministic ID for a chunk: the same text at the same position of the
+    same source always maps to the same vector, so writes become upserts.
     """
-    Inserts a list of documents into the ChromaDB vector store.
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{source}|{chunk_index}|{content_hash}".encode("utf-8")).hexdigest()[:32]
+
+def assign_chunk_ids(documents):
+    """Sets doc.id from source + chunk_index + content on documents that lack one."""
+    for i, doc in enumerate(documents):
+        if not doc.id:
+            doc.metadata.setdefault("chunk_index", i)
+            doc.id = chunk_id(doc.metadata.get("source", ""), doc.metadata["chunk_index"], doc.page_content)
+    return documents
+
+def filter_new(documents):
+    """
+    Returns only the documents whose ID is not in the store yet. Unchanged
+    chunks are skipped before they ever reach the embedder.
+    """
+    if not documents:
+        return []
+    stored = set(_get_vectorstore().get(ids=[doc.id for doc in documents], include=[])["ids"])
+    return [doc for doc in documents if doc.id not in stored]
+
+def stored_fingerprints():
+    """
+    (SimHash, source) of every stored chunk that has one, to seed a
+    NearDuplicateFilter with what the index already holds.
+    """
+    metadatas = _get_vectorstore().get(include=["metadatas"])["metadatas"]
+    return [(int(meta["simhash"], 16), meta.get("source")) for meta in metadatas if meta and meta.get("simhash")]
+
+def delete_stale_chunks(source, keep_ids):
+    """
+    Deletes the chunks stored for `source` that are not in keep_ids, e.g.
+    the tail of a page that got shorter. Returns how many were removed.
+    Like write_documents, it leaves index_version alone: callers bump it once
+    when their ingestion session commits.
+    """
+    vectorstore = _get_vectorstore()
+    stored = vectorstore.get(where={"source": source}, include=[])["ids"]
+    stale = [id for id in stored if id not in keep_ids]
+    if stale:
+        vectorstore.delete(ids=stale)
+    return len(stale)
+
+def embed_documents(documents):
+    """
+    Embeds a batch of documents. Returns one vector per document.
+    """
+    return get_embeddings().embed_documents([doc.page_content for doc in documents])
+
+def write_documents(documents, vectors):
+    """
+    Upserts a batch of already-embedded documents into ChromaDB by chunk ID.
+    The vectors go straight to the collection: Chroma.add_texts would embed
+    the texts a second time.
+    """
+    _get_collection().upsert(
+        ids=[doc.id for doc in documents],
+        embeddings=vectors,
+        documents=[doc.page_content for doc in documents],
+        metadatas=[doc.metadata for doc in documents],
+    )
+
+def insert_data(documents, batch_size=64, dedup=True):
+    """
+    Upserts a list of documents into the ChromaDB vector store. Every source
+    in `documents` is treated as complete: chunks stored for it that are not
+    in the list anymore are deleted. With dedup, chunks that nearly copy
+    another source's chunk are left out (see near_dup.py); they still count
+    as part of their source when pruning.
     """
     if not documents:
         print("💎 No new content to ingest.")
         return
 
-    print(f"💎 Ingesting {len(documents)} chunks into ChromaDB...")
-    
-    # Initialize Vector Store
-    embeddings = OpenAIEmbeddings()
-    persist_directory = os.path.join(os.path.dirname(__file__), "chroma_db")
-    
-    vectorstore = Chroma(
-        persist_directory=persist_directory, 
-        embedding_function=embeddings
-    )
-    
-    vectorstore.add_documents(documents)
+    assign_chunk_ids(documents)
+    ids_by_source = {}
+    for doc in documents:
+        ids_by_source.setdefault(doc.metadata.get("source", ""), set()).add(doc.id)
+
+    if dedup:
+        near_duplicates = NearDuplicateFilter()
+        near_duplicates.seed(stored_fingerprints())
+        documents = near_duplicates.filter(documents)
+        stats = near_duplicates.stats()
+        if stats["dropped"]:
+            print(f"💎 Skipped {stats['dropped']} near-duplicate chunks (~{stats['saved_embedding_tokens']} embedding tokens).")
+
+    removed = 0
+    for source, keep_ids in ids_by_source.items():
+        removed += delete_stale_chunks(source, keep_ids)
+
+    new_documents = filter_new(documents)
+    print(f"💎 Ingesting {len(new_documents)} new chunks into ChromaDB ({len(documents) - len(new_documents)} unchanged, {removed} stale removed)...")
+
+    for start in range(0, len(new_documents), batch_size):
+        batch = new_documents[start:start + batch_size]
+        write_documents(batch, embed_documents(batch))
+
+    if new_documents or removed:
+        # One bump per call: the agent's caches and keyword index refresh once
+        index_version.bump()
     print("💎 Ingestion Finished!")
@@ -9,19 +9,26 @@ ARCHITECTURE: Capability Matching
 """
 
 from typing import List, Literal, Dict, Any, Optional
+import os
+import re
+import asyncio
+import json
 
 from langchain.tools import tool
+from langchain_core.tools import StructuredTool
 from langchain.agents import create_agent
+from langchain.agents.structured_output import ToolStrategy
 from copilotkit import CopilotKitMiddleware, CopilotKitState
-from system_prompt import AGENT_PROMPT2
-import os
-from langchain_openai import OpenAIEmbeddings
-from langchain_chroma import Chroma
-
-# Initialize Vector Store
-persist_directory = os.path.join(os.path.dirname(__file__), "chroma_db")
-embeddings = OpenAIEmbeddings()
-vectorstore = Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+from prompt_builder import PromptAssemblyMiddleware, STATIC_PREFIX
+from history_compaction import HistoryCompactionMiddleware
+from tool_concurrency import ToolConcurrencyMiddleware
+from structured_mode import RESPONSE_MODE, StructuredResponseMiddleware
+from structure import AgentOutputSchema, content_errors
+from ui_stream import UIStreamMiddleware
+from card_validation import CardValidationMiddleware, rejection_message
+from answer_cache import ANSWER_CACHE, AnswerCacheMiddleware
+from retrieval import asearch, search
+from image_table import get_image_table
 
 from pydantic import BaseModel, Field
 
@@ -31,26 +38,97 @@ from pydantic import BaseModel, Field
 
 class SearchKnowledgeBaseSchema(BaseModel):
     query: str = Field(..., description="The search query string")
+    mode: Optional[Literal["hybrid", "vector", "keyword"]] = Field(None, description="Retrieval mode. 'keyword' for exact terms (SKUs, names, places), 'vector' for vague or conceptual questions, default 'hybrid'")
+
+# Content of each result is trimmed to roughly this many tokens (4 chars each)
+SEARCH_RESULT_TOKENS = int(os.getenv("SEARCH_RESULT_TOKENS", "200"))
+
+# Markdown that costs tokens without carrying facts: inline images (their URLs
+# come back in `images`), link targets, blank-line runs, bold/italic markers
+_IMAGES = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINKS = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_BLANK_LINES = re.compile(r"\n[ \t]*(?:\n[ \t]*)+")
+_EMPHASIS = re.compile(r"\*\*|__")
+
+def _trim(text: str, max_tokens: int) -> str:
+    text = _LINKS.sub(r"\1", _IMAGES.sub("", text))
+    text = _EMPHASIS.sub("", _BLANK_LINES.sub("\n", text)).strip()
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars].rstrip() + "…"
+
+def _image_ids(doc) -> List[str]:
+    return [id for id in doc.metadata.get("image_ids", "").split(",") if id]
+
+def resolve_images(results) -> Dict[str, str]:
+    """
+    {image ID: URL} for every image of the results, in one image_table
+    lookup. Blocking (SQLite): async callers run it in a thread.
+    """
+    ids = [id for doc in results for id in _image_ids(doc)]
+    return get_image_table().urls(ids) if ids else {}
+
+def image_urls(doc, images_by_id: Dict[str, str]) -> List[str]:
+    """
+    Image URLs of a chunk, from its image_table IDs resolved by
+    resolve_images(). Chunks indexed before the table existed still carry
+    the URLs themselves.
+    """
+    ids = _image_ids(doc)
+    if not ids:
+        return [url for url in doc.metadata.get("image_urls", "").split(",") if url]
+    return [images_by_id[id] for id in ids if id in images_by_id]
 
-@tool(args_schema=SearchKnowledgeBaseSchema)
-def search_knowledge_base(query: str):
+def encode_results(results, max_tokens: int = SEARCH_RESULT_TOKENS, images_by_id: Optional[Dict[str, str]] = None) -> str:
+    """
+    Compact JSON for the model: results are grouped by source, in the order
+    of each source's best-ranked result, so every source URL and image URL
+    appears once (an image shared by several sources, like a site logo, only
+    under the first) and no result needs a reference to look up.
+    """
+    if images_by_id is None:
+        images_by_id = resolve_images(results)
+    groups: Dict[str, Dict[str, Any]] = {}
+    seen_images = set()
+    for doc in results:
+        source = doc.metadata.get("source", "Unknown")
+        group = groups.setdefault(source, {"source": source, "content": []})
+        group["content"].append(_trim(doc.page_content, max_tokens))
+        for url in image_urls(doc, images_by_id):
+            if url not in seen_images:
+                seen_images.add(url)
+                group.setdefault("images", []).append(url)
+    return json.dumps({"results": list(groups.values())}, ensure_ascii=False, separators=(",", ":"))
+
+def _search_knowledge_base(query: str, mode: str = None):
     """
     The PRIMARY source of truth. Searches the company's internal knowledge base.
     Use this for ALL queries: Services, Locations, Policies, History, Contact info, etc.
-    Returns structured JSON with content, image_urls, and source citations.
+    Returns JSON {results}: one entry per source URL with its matching
+    `content` excerpts (best first) and any `images` URLs.
     """
-    results = vectorstore.similarity_search(query, k=3)
-    
-    structured_results = []
-    for doc in results:
-        structured_results.append({
-            "content": doc.page_content,
-            "source": doc.metadata.get("source", "Unknown"),
-            "images": doc.metadata.get("image_urls", "").split(",") if doc.metadata.get("image_urls") else []
-        })
-    
-    import json
-    return json.dumps(structured_results, indent=2)
+    return encode_results(search(query, k=3, mode=mode))
+
+async def _asearch_knowledge_base(query: str, mode: str = None):
+    try:
+        results = await asearch(query, k=3, mode=mode)
+    except asyncio.TimeoutError:
+        return json.dumps({"error": "Knowledge base search timed out. Answer from what you already know or ask the user to retry."})
+
+    # One image_table lookup for all results, off the event loop
+    images_by_id = await asyncio.to_thread(resolve_images, results)
+    return encode_results(results, images_by_id=images_by_id)
+
+# Async graphs await the coroutine; sync callers (tool.invoke, graph.invoke) get
+# the blocking path instead of a "does not support sync invocation" error
+search_knowledge_base = StructuredTool.from_function(
+    func=_search_knowledge_base,
+    coroutine=_asearch_knowledge_base,
+    name="search_knowledge_base",
+    args_schema=SearchKnowledgeBaseSchema,
+)
 
 
 
@@ -59,9 +137,10 @@ def search_knowledge_base(query: str):
 # ============================================================
 
 class RenderUISchema(BaseModel):
+    # id comes first so it is known while the content is still streaming
+    id: Optional[str] = Field(None, description="Optional stable ID to update existing card")
     title: str = Field(..., description="The card title")
     content: List[Dict[str, Any]] = Field(..., description="A list of content blocks (Markdown, Image, Form, etc.)")
-    id: Optional[str] = Field(None, description="Optional stable ID to update existing card")
     design: Optional[dict] = Field(None, description="""
         Optional design config with these properties:
         - themeColor: str (hex color for accents)
@@ -80,15 +159,18 @@ def render_ui(title: str, content: List[Dict[str, Any]], id: str = None, design:
     The PRIMARY tool for generating UI. This is the bridge to the frontend.
     Tell the user what to show on the screen.
     """
-    # This tool doesn't need to DO anything in Python except return success.
-    # The frontend intercepts the arguments and handles rendering.
+    # The frontend intercepts the arguments and handles rendering; Python only
+    # checks the blocks so malformed ones go back to the model, not the screen.
+    errors = content_errors(content)
+    if errors:
+        return rejection_message(title, errors)
     return f"UI card '{title}' rendered."
 
 # For backwards compatibility, keep show_dynamic_card as an alias
 @tool(args_schema=RenderUISchema)
 def show_dynamic_card(title: str, content: List[Dict[str, Any]], id: str = None, design: dict = None, layout: str = "vertical", clearHistory: bool = False, dimensions: dict = None):
     """Alias for render_ui"""
-    return render_ui(title, content, id, design, layout, clearHistory, dimensions)
+    return render_ui.func(title, content, id, design, layout, clearHistory, dimensions)
 
 # ============================================================
 # 3. ACTION TOOLS (State Mutations, No UI)
@@ -97,7 +179,9 @@ def show_dynamic_card(title: str, content: List[Dict[str, Any]], id: str = None,
 class SetThemeColorSchema(BaseModel):
     themeColor: str = Field(..., description="Hex color code (e.g., '#2563EB')")
 
-@tool(args_schema=SetThemeColorSchema)
+# Pure UI actions: the effect happens on the frontend, so the turn ends as soon
+# as they return (return_direct) instead of asking the model to confirm them
+@tool(args_schema=SetThemeColorSchema, return_direct=True)
 def setThemeColor(themeColor: str):
     """
     Changes the primary theme color of the website.
@@ -108,7 +192,7 @@ class DeleteCardSchema(BaseModel):
     id: Optional[str] = Field(None, description="The ID of the card to delete")
     title: Optional[str] = Field(None, description="The title of the card to delete (if ID is unknown)")
 
-@tool(args_schema=DeleteCardSchema)
+@tool(args_schema=DeleteCardSchema, return_direct=True)
 def delete_card(id: str = None, title: str = None):
     """
     Deletes a card/widget from the screen.
@@ -124,12 +208,33 @@ class AgentState(CopilotKitState):
     """
     Agent state schema. Store session-specific data here.
     """
-    pass
+    # Synced from the frontend canvas (useCoAgent)
+    canvas_width: int
+    canvas_height: int
+    # render_ui cards still being generated, by card id (ui_stream.py)
+    ui_stream: Dict[str, Any]
 
 # ============================================================
 # 5. AGENT CONFIGURATION
 # ============================================================
 
+middleware = [
+    CopilotKitMiddleware(),
+    HistoryCompactionMiddleware(),
+    PromptAssemblyMiddleware(),
+    ToolConcurrencyMiddleware(),
+    CardValidationMiddleware(),
+    UIStreamMiddleware(),
+]
+if ANSWER_CACHE:
+    # Opt-in: replay stored answers to canonical first questions
+    middleware.insert(1, AnswerCacheMiddleware())
+response_format = None
+if RESPONSE_MODE == "structured":
+    # Opt-in: chat message and card come back in one structured generation
+    middleware.append(StructuredResponseMiddleware())
+    response_format = ToolStrategy(AgentOutputSchema)
+
 agent = create_agent(
     model="gpt-4.1",
     tools=[
@@ -144,9 +249,10 @@ agent = create_agent(
         setThemeColor,
         delete_card,
     ],
-    middleware=[CopilotKitMiddleware()],
+    middleware=middleware,
+    response_format=response_format,
     state_schema=AgentState,
-    system_prompt=AGENT_PROMPT2
+    system_prompt=STATIC_PREFIX
 )
 
 graph = agent
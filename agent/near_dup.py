@@ -0,0 +1,114 @@
+"""
+Near-duplicate chunk detection at ingest time (SimHash).
+
+Scraped sites repeat the same blocks on dozens of pages: promo banners,
+legal text, "about us" teasers. Embedding every copy costs money, grows the
+index and lets one block take all k search results. NearDuplicateFilter
+drops a chunk when a chunk of another source is within DEDUP_MAX_DISTANCE
+bits of it (64-bit SimHash over word 3-shingles), so only one copy gets
+embedded.
+
+Kept chunks carry their fingerprint in metadata["simhash"], and a filter is
+seeded with the fingerprints already in the index before a run starts. The
+source that first stored a block keeps owning it no matter which page a
+later crawl parses first, and a page never loses its own chunks to an older
+version of itself. Dropping a chunk never deletes anything: pages are still
+pruned against their full chunk set. When the owning page stops carrying
+the block, the next crawl of a page that has it stores it again.
+
+Lookups don't compare against every earlier chunk: the fingerprint is cut
+into DEDUP_MAX_DISTANCE + 1 bands, and two fingerprints that close always
+share at least one band exactly, so only chunks sharing a band are compared.
+"""
+
+import os
+import hashlib
+
+from bm25 import tokenize
+
+# Hamming distance at or below which two chunks count as duplicates; 0 only
+# drops exact (token-level) repeats
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))
+SHINGLE_SIZE = 3
+FINGERPRINT_BITS = 64
+
+
+def simhash(text):
+    """64-bit SimHash of the text's word shingles."""
+    tokens = tokenize(text)
+    shingles = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))]
+    # One 64-character bit string per shingle; each zipped column is one bit
+    # position, set in the fingerprint when most shingles set it
+    rows = [format(int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little"), "064b") for shingle in shingles]
+    half = len(rows) / 2
+    return int("".join("1" if column.count("1") > half else "0" for column in zip(*rows)), 2)
+
+
+def fingerprint_hex(fingerprint):
+    """The metadata form of a fingerprint (Chroma integers are signed 64-bit)."""
+    return format(fingerprint, "016x")
+
+
+class NearDuplicateFilter:
+    """Remembers the chunks it has let through and drops other sources' near-copies of them."""
+
+    def __init__(self, max_distance=DEDUP_MAX_DISTANCE):
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        # (shift, mask) per band; the last band takes the leftover bits
+        self._bands = [(i * width, (1 << (width if i < bands - 1 else FINGERPRINT_BITS - i * width)) - 1) for i in range(bands)]
+        self._buckets = [{} for _ in self._bands]
+        self.kept = 0
+        self.dropped = 0
+        self.dropped_chars = 0
+
+    def seed(self, fingerprints):
+        """Remembers (fingerprint, source) pairs already in the index, without counting them."""
+        for fingerprint, owner in fingerprints:
+            self._remember(fingerprint, owner)
+
+    def is_duplicate(self, text, owner=None, fingerprint=None):
+        """
+        True if text is a near-copy of a chunk seen before from another owner
+        (any earlier chunk when owner is None); otherwise remembers it.
+        """
+        fingerprint = simhash(text) if fingerprint is None else fingerprint
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            for other, other_owner in buckets.get(key, ()):
+                if (owner is None or other_owner != owner) and bin(fingerprint ^ other).count("1") <= self.max_distance:
+                    self.dropped += 1
+                    self.dropped_chars += len(text)
+                    return True
+        self._remember(fingerprint, owner)
+        self.kept += 1
+        return False
+
+    def filter(self, documents):
+        """
+        The documents that aren't near-copies of another source's chunks.
+        Kept documents get their fingerprint in metadata["simhash"].
+        """
+        kept = []
+        for doc in documents:
+            fingerprint = simhash(doc.page_content)
+            if not self.is_duplicate(doc.page_content, doc.metadata.get("source"), fingerprint):
+                doc.metadata["simhash"] = fingerprint_hex(fingerprint)
+                kept.append(doc)
+        return kept
+
+    def _keys(self, fingerprint):
+        return [(fingerprint >> shift) & mask for shift, mask in self._bands]
+
+    def _remember(self, fingerprint, owner):
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            buckets.setdefault(key, []).append((fingerprint, owner))
+
+    def stats(self):
+        """What dropping the duplicates saved; tokens are estimated at 4 chars each."""
+        return {
+            "chunks": self.kept + self.dropped,
+            "dropped": self.dropped,
+            "dropped_chars": self.dropped_chars,
+            "saved_embedding_tokens": self.dropped_chars // 4,
+        }
@@ -0,0 +1,130 @@
+"""
+Parse stage of the scraper: fetched HTML -> markdown chunks + links.
+
+This is the CPU-heavy part of a crawl (HTML parsing, cleanup, markdownify,
+splitting), so JewelScraper runs it in a process pool, away from the event
+loop that does the fetching. parse_page() is a plain top-level function of
+picklable arguments and returns a small ParsedPage of strings, so only the
+HTML goes into a worker and only the chunk texts come back; Documents and
+chunk IDs are built in the main process.
+
+Each chunk comes with the images that appear in or near its text, found by
+their position in the markdown, instead of every image of the page.
+
+The BeautifulSoup backend is pluggable (SCRAPER_HTML_PARSER). lxml is much
+faster than the pure-Python html.parser and is used when it's installed.
+"""
+
+import os
+import re
+from bisect import bisect_left
+from importlib.util import find_spec
+from typing import List, NamedTuple, Tuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Tag
+from markdownify import MarkdownConverter
+from langchain_text_splitters import MarkdownTextSplitter
+
+HTML_PARSER = os.getenv("SCRAPER_HTML_PARSER") or ("lxml" if find_spec("lxml") else "html.parser")
+
+# Removed before converting; scripts and styles aren't content, and navigation,
+# headers and footers repeat on every page
+SKIP_TAGS = frozenset(['script', 'style', 'nav', 'footer', 'header'])
+
+_converter = MarkdownConverter(heading_style="ATX")
+_splitter = MarkdownTextSplitter(chunk_size=1000, chunk_overlap=100, add_start_index=True)
+
+# ![alt](src) or ![alt](src "title"), as markdownify writes images
+_IMAGE = re.compile(r'!\[[^\]]*\]\((\S+?)(?:\s+"[^"]*")?\)')
+# Images this many characters before or after a chunk still belong to it
+IMAGE_NEAR_CHARS = int(os.getenv("SCRAPER_IMAGE_NEAR_CHARS", "200"))
+MAX_CHUNK_IMAGES = 10
+
+
+class ParsedPage(NamedTuple):
+    title: str
+    chunks: List[Tuple[int, str, List[str]]]  # (chunk_index, text, image URLs)
+    links: List[str]
+
+
+def extract(soup):
+    """
+    Walks the parsed tree once and collects what the scraper needs:
+
+        title, link hrefs, main content, boilerplate elements
+
+    Links only come from outside the boilerplate (SKIP_TAGS). The main content is the first <main> outside
+    the boilerplate, or <body>.
+    """
+    title = main = body = None
+    links, boilerplate = [], []
+    # Depth-first in document order; `skipped` marks subtrees inside boilerplate
+    stack = [(soup, False)]
+    while stack:
+        node, skipped = stack.pop()
+        name = node.name
+        if name in SKIP_TAGS and not skipped:
+            boilerplate.append(node)
+            skipped = True
+        if name == 'a':
+            href = node.get('href')
+            if href and not skipped:
+                links.append(href)
+        elif name == 'title':
+            if title is None:
+                title = node.string
+        elif name == 'main':
+            if main is None and not skipped:
+                main = node
+        elif name == 'body':
+            if body is None:
+                body = node
+        stack.extend((child, skipped) for child in reversed(node.contents) if isinstance(child, Tag))
+    return title, links, main or body, boilerplate
+
+
+def chunk_images(url, markdown_text, chunks):
+    """
+    Image URLs for each (start, text) chunk of markdown_text: the images
+    inside the chunk or within IMAGE_NEAR_CHARS of it, in document order.
+    """
+    found = [(match.start(), urljoin(url, match.group(1))) for match in _IMAGE.finditer(markdown_text)]
+    positions = [position for position, _ in found]
+    images = []
+    for start, text in chunks:
+        first = bisect_left(positions, start - IMAGE_NEAR_CHARS)
+        last = bisect_left(positions, start + len(text) + IMAGE_NEAR_CHARS)
+        urls = list(dict.fromkeys(src for _, src in found[first:last]))
+        images.append(urls[:MAX_CHUNK_IMAGES])
+    return images
+
+
+def parse_page(url, html, parser=HTML_PARSER):
+    """
+    Turns a fetched page into markdown chunks with their images, and the
+    outgoing links.
+    """
+    soup = BeautifulSoup(html, parser)
+    title, links, main_content, boilerplate = extract(soup)
+
+    title = str(title) if title else url
+    # Strip fragment identifiers
+    links = [urljoin(url, href).split('#')[0] for href in links]
+    if not main_content:
+        return ParsedPage(title, [], [])
+
+    # Unhook the boilerplate and convert the main subtree in place
+    for element in boilerplate:
+        element.extract()
+    markdown_text = _converter.convert_soup(main_content)
+
+    # Chunk, keeping the splitter's index so chunk IDs stay stable
+    chunks = [
+        (i, doc.metadata["start_index"], doc.page_content)
+        for i, doc in enumerate(_splitter.create_documents([markdown_text]))
+        if doc.page_content.strip()
+    ]
+    images = chunk_images(url, markdown_text, [(start, text) for _, start, text in chunks])
+
+    return ParsedPage(title, [(i, text, urls) for (i, _, text), urls in zip(chunks, images)], links)
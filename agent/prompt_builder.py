@@ -0,0 +1,130 @@
+"""
+Assembles the agent's system prompt from the sections of AGENT_PROMPT2.
+
+Every model call starts with the same byte-stable core (role, objectives,
+themes, workflow, content blocks, rules), so the provider's prompt cache
+keeps hitting across turns and sessions. OpenAI only caches prompts of
+PROMPT_CACHE_MIN_TOKENS or more, so the core is kept above that on its own.
+The layout guide (canvas matrix, decision framework, examples) is appended
+after the core only when the turn is likely to end in render_ui; greetings,
+theme changes and card deletions go without it. tool_definitions is left
+out entirely: it repeats the tool schemas that are already sent with every
+request.
+
+Each of the two prompt variants gets its own prompt_cache_key so OpenAI
+routes it to a machine that already holds its prefix (openai>=1.98 sends
+the parameter). Set PROMPT_CACHE_KEY=0 to stop sending the key (e.g. for
+non-OpenAI models).
+"""
+
+import os
+import re
+import hashlib
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from system_prompt import AGENT_PROMPT2
+
+# Shortest prompt prefix OpenAI caches; STATIC_PREFIX has to reach it alone
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+CORE_SECTIONS = (
+    "agent_config",
+    "core_objectives",
+    "visual_architecture",
+    "workflow",
+    "content_block_reference",
+    "critical_rules",
+)
+LAYOUT_SECTIONS = ("canvas_intelligence", "decision_framework", "example_prompts_and_responses")
+
+_SECTION_HEADER = re.compile(r"^([a-z_]+):[ \t]*$", re.MULTILINE)
+
+# Turns that never need the layout guide: the whole message is small talk, or
+# it only asks to recolor the site or remove cards
+_SMALL_TALK = re.compile(
+    r"^(hi|hello|hey|yo|thanks|thank you|thx|ok|okay|cool|great|nice|bye|goodbye"
+    r"|good (morning|afternoon|evening)|how are you)\b[\s\w,']{0,30}[!.?]*$",
+    re.IGNORECASE,
+)
+_THEME_ACTION = re.compile(r"\b(theme|colou?r)\b", re.IGNORECASE)
+_DELETE_ACTION = re.compile(r"\b(delete|remove|close|clear|dismiss)\b.*\bcards?\b", re.IGNORECASE)
+_WANTS_CONTENT = re.compile(r"\b(show|display|render|create|add|tell|what|who|where|how|list)\b", re.IGNORECASE)
+
+
+def split_sections(prompt):
+    """{top-level key: section text} in prompt order."""
+    headers = list(_SECTION_HEADER.finditer(prompt))
+    sections = {}
+    for header, following in zip(headers, headers[1:] + [None]):
+        end = following.start() if following else len(prompt)
+        sections[header.group(1)] = prompt[header.start():end].rstrip()
+    return sections
+
+
+SECTIONS = split_sections(AGENT_PROMPT2)
+STATIC_PREFIX = "\n\n".join(SECTIONS[name] for name in CORE_SECTIONS)
+LAYOUT_GUIDE = "\n\n".join(SECTIONS[name] for name in LAYOUT_SECTIONS)
+
+
+def message_text(message):
+    """Text of a message whose content is a string or a list of content parts."""
+    content = message.content
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content.strip()
+
+
+def _latest_user_text(messages):
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message_text(message)
+    return ""
+
+
+def needs_layout(messages):
+    """Whether the turn answering the latest user message may call render_ui."""
+    text = _latest_user_text(messages)
+    if not text:
+        return True
+    small_talk = _SMALL_TALK.match(text)
+    if small_talk and not _WANTS_CONTENT.search(text[small_talk.end(1):]):
+        return False
+    if (_THEME_ACTION.search(text) or _DELETE_ACTION.search(text)) and not _WANTS_CONTENT.search(text):
+        return False
+    return True
+
+
+def build_prompt(messages):
+    """The system prompt for the next model call on `messages`."""
+    if needs_layout(messages):
+        return STATIC_PREFIX + "\n\n" + LAYOUT_GUIDE
+    return STATIC_PREFIX
+
+
+def cache_key(prompt):
+    return "sample_agent-" + hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class PromptAssemblyMiddleware(AgentMiddleware):
+    """Swaps in the assembled system prompt before every model call."""
+
+    def __init__(self, send_cache_key=None):
+        super().__init__()
+        if send_cache_key is None:
+            send_cache_key = os.getenv("PROMPT_CACHE_KEY", "1") != "0"
+        self.send_cache_key = send_cache_key
+
+    def _assemble(self, request):
+        prompt = build_prompt(request.messages)
+        overrides = {"system_message": SystemMessage(content=prompt)}
+        if self.send_cache_key:
+            overrides["model_settings"] = {**request.model_settings, "prompt_cache_key": cache_key(prompt)}
+        return request.override(**overrides)
+
+    def wrap_model_call(self, request, handler):
+        return handler(self._assemble(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(self._assemble(request))
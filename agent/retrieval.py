@@ -0,0 +1,222 @@
+"""
+Knowledge-base retrieval used by the agent's search_knowledge_base tool.
+
+Three modes, selectable per query (RETRIEVAL_MODE sets the default):
+- "vector":  dense similarity search in Chroma
+- "keyword": local BM25 over the same chunks (no network, sub-millisecond)
+- "hybrid":  both, merged with reciprocal rank fusion
+
+The async path never blocks the LangGraph event loop: the query is embedded
+with the embedder's async client and the Chroma query runs in a small,
+bounded thread pool. Every call is capped by SEARCH_TIMEOUT seconds and is
+cancelled cleanly when the caller goes away. In hybrid mode both paths run
+at once, and if the dense path takes longer than VECTOR_TIMEOUT, the keyword
+results are returned on their own.
+
+Nothing heavy happens at import: Chroma and the embedder are opened on first
+use (thread-safe), so importing the agent graph stays fast. Set
+RETRIEVAL_WARMUP=1 to open them in a background thread right away instead.
+"""
+
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from langchain_core.documents import Document
+from bm25 import BM25Index, reciprocal_rank_fusion
+import index_version
+from embeddings import get_embeddings
+from search_cache import SearchCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "10"))
+VECTOR_TIMEOUT = float(os.getenv("VECTOR_TIMEOUT", "3"))
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Each path contributes this many candidates per requested result to fusion
+CANDIDATES_PER_RESULT = 3
+
+persist_directory = os.path.join(os.path.dirname(__file__), "chroma_db")
+
+# Opened lazily by get_vectorstore(); assign directly to swap in another store
+embeddings = None
+vectorstore = None
+_init_lock = threading.Lock()
+
+# Query-result cache; set SEARCH_CACHE_SIMILARITY (e.g. 0.95) to also reuse
+# results of near-identical questions
+search_cache = SearchCache(
+    maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "300")),
+    similarity_threshold=float(os.getenv("SEARCH_CACHE_SIMILARITY")) if os.getenv("SEARCH_CACHE_SIMILARITY") else None,
+)
+
+# Chroma queries are sync; they run here so they never stall the event loop
+_chroma_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SEARCH_THREADS", "4")),
+    thread_name_prefix="chroma-search",
+)
+
+
+_lexical_index = None
+_lexical_version = None
+_lexical_rebuilding = False
+_lexical_lock = threading.Lock()
+
+
+def get_vectorstore():
+    """Opens the embedder and the persistent Chroma store on first use."""
+    global embeddings, vectorstore
+    if vectorstore is None or embeddings is None:
+        with _init_lock:
+            if embeddings is None:
+                embeddings = get_embeddings()
+            if vectorstore is None:
+                from langchain_chroma import Chroma
+
+                vectorstore = Chroma(persist_directory=persist_directory, embedding_function=embeddings)
+    return vectorstore
+
+
+async def _aget_vectorstore():
+    # The first open hits the disk and imports chromadb: keep it off the loop
+    if vectorstore is None or embeddings is None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_chroma_pool, get_vectorstore)
+    return vectorstore
+
+
+def warm_up():
+    """Opens the vector store and builds the keyword index."""
+    get_vectorstore()
+    get_lexical_index()
+
+
+def get_lexical_index():
+    """
+    Returns the BM25 index over every chunk in Chroma. The first call builds
+    it; after a re-ingest the current index keeps answering while a fresh one
+    is built in the background, so queries never wait on a full Chroma read.
+    """
+    global _lexical_index, _lexical_version, _lexical_rebuilding
+    with _lexical_lock:
+        if _lexical_index is None:
+            _lexical_index, _lexical_version = _build_lexical_index()
+        elif not _lexical_rebuilding and _lexical_version != index_version.current():
+            _lexical_rebuilding = True
+            _chroma_pool.submit(_rebuild_lexical_index)
+        return _lexical_index
+
+
+def _build_lexical_index():
+    # Read the version first: a bump during the build triggers another one
+    version = index_version.current()
+    stored = get_vectorstore().get(include=["documents", "metadatas"])
+    index = BM25Index(
+        Document(id=id, page_content=text, metadata=metadata or {})
+        for id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+    )
+    return index, version
+
+
+def _rebuild_lexical_index():
+    global _lexical_index, _lexical_version, _lexical_rebuilding
+    try:
+        index, version = _build_lexical_index()
+        with _lexical_lock:
+            _lexical_index, _lexical_version = index, version
+    except Exception as e:
+        print(f"💎 Keyword index rebuild failed, keeping the previous one: {e}")
+    finally:
+        with _lexical_lock:
+            _lexical_rebuilding = False
+
+
+def keyword_search(query, k=3):
+    """BM25 search over the local index. Returns the top-k Documents."""
+    return [doc for doc, _ in get_lexical_index().search(query, k=k)]
+
+
+def vector_search(query, k=3):
+    """Dense search in Chroma, through the query-result cache."""
+    results = search_cache.get(query, k)
+    if results is None:
+        store = get_vectorstore()
+        query_vector = embeddings.embed_query(query)
+        results = search_cache.get_similar(query, query_vector, k)
+        if results is None:
+            results = store.similarity_search_by_vector(query_vector, k=k)
+            search_cache.put(query, query_vector, results, k)
+    return results
+
+
+def search(query, k=3, mode=None):
+    """Blocking search. Returns the top-k Documents for query."""
+    mode = mode or RETRIEVAL_MODE
+    if mode == "keyword":
+        return keyword_search(query, k)
+    candidates = k * CANDIDATES_PER_RESULT
+    if mode == "vector":
+        return vector_search(query, candidates)[:k]
+    return reciprocal_rank_fusion([vector_search(query, candidates), keyword_search(query, candidates)])[:k]
+
+
+async def asearch(query, k=3, mode=None, timeout=None):
+    """
+    Non-blocking search. Raises asyncio.TimeoutError if it takes longer than
+    `timeout` seconds (SEARCH_TIMEOUT by default).
+    """
+    return await asyncio.wait_for(_asearch(query, k, mode or RETRIEVAL_MODE), timeout=timeout or SEARCH_TIMEOUT)
+
+
+async def _asearch(query, k, mode):
+    candidates = k * CANDIDATES_PER_RESULT
+    if mode == "keyword":
+        return (await _akeyword_search(query, candidates))[:k]
+    if mode == "vector":
+        return (await _avector_search(query, candidates))[:k]
+
+    # Hybrid: the dense search starts first and runs while the keyword index
+    # answers; the keyword results double as the fallback when it is slow
+    deadline = asyncio.get_running_loop().time() + VECTOR_TIMEOUT
+    dense_task = asyncio.ensure_future(_avector_search(query, candidates))
+    try:
+        lexical = await _akeyword_search(query, candidates)
+        try:
+            dense = await asyncio.wait_for(dense_task, timeout=max(0.0, deadline - asyncio.get_running_loop().time()))
+        except asyncio.TimeoutError:
+            print(f"💎 Vector search slower than {VECTOR_TIMEOUT}s, answering from keyword index: {query!r}")
+            return lexical[:k]
+    finally:
+        # Timed out, or the caller went away: the dense work stops too
+        dense_task.cancel()
+    return reciprocal_rank_fusion([dense, lexical])[:k]
+
+
+async def _akeyword_search(query, k):
+    # Only the very first build blocks; later rebuilds happen in the background
+    if _lexical_index is None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_chroma_pool, get_lexical_index)
+    return keyword_search(query, k)
+
+
+async def _avector_search(query, k):
+    results = search_cache.get(query, k)
+    if results is None:
+        store = await _aget_vectorstore()
+        query_vector = await embeddings.aembed_query(query)
+        results = search_cache.get_similar(query, query_vector, k)
+        if results is None:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                _chroma_pool, partial(store.similarity_search_by_vector, query_vector, k=k)
+            )
+            search_cache.put(query, query_vector, results, k)
+    return results
+
+
+if os.getenv("RETRIEVAL_WARMUP"):
+    threading.Thread(target=warm_up, name="retrieval-warmup", daemon=True).start()
@@ -1,152 +1,502 @@
 import os
-import requests
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md
-from urllib.parse import urljoin, urlparse
+import asyncio
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import httpx
+from urllib.parse import urlparse
 from langchain_core.documents import Document
-from langchain_text_splitters import MarkdownTextSplitter
-from insert_data_db import insert_data
+from page_parser import HTML_PARSER, parse_page
+from image_table import get_image_table, image_id
+from near_dup import NearDuplicateFilter
+from insert_data_db import chunk_id, filter_new, delete_stale_chunks, embed_documents, write_documents, stored_fingerprints
+import index_version
+from frontier import PriorityFrontier, normalize_url
+from crawl_policy import USER_AGENT, parse_robots, parse_sitemap, url_priority
+from crawl_state import DEFAULT_STATE_PATH, CrawlState
 from dotenv import load_dotenv
-import time
 
 load_dotenv()
 
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(__file__), "scraped_urls.txt")
+
+
+class HostLimiter:
+    """
+    Caps how hard we hit a single host: at most `max_concurrency` requests in
+    flight and at most `rate` requests started per second. `clock` returns
+    the current time in seconds (default: the running loop's clock).
+    """
+
+    def __init__(self, max_concurrency=4, rate=10.0, clock=None):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.min_interval = 1.0 / rate if rate else 0.0
+        self.clock = clock
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        if self.min_interval:
+            clock = self.clock or asyncio.get_running_loop().time
+            async with self._lock:
+                now = clock()
+                wait = self._next_slot - now
+                self._next_slot = max(now, self._next_slot) + self.min_interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+
+def parse_pool(workers):
+    """
+    Process pool for the parse stage. Workers come from a fork server rather
+    than a fork of the crawler, which already runs threads by then.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
 class JewelScraper:
-    def __init__(self, start_url, max_depth=3, max_pages=50):
+    def __init__(self, start_url, max_depth=3, max_pages=50, concurrency=8, per_host_concurrency=4, per_host_rate=10.0, batch_size=64, flush_interval=2.0, recrawl=False, parse_workers=None, html_parser=HTML_PARSER, dedup=True, respect_robots=True, use_sitemaps=True, max_sitemaps=50, crawl_state_path=DEFAULT_STATE_PATH, history_path=DEFAULT_HISTORY_PATH):
         self.start_url = start_url
         self.max_depth = max_depth
         self.max_pages = max_pages
-        self.history_file = os.path.join(os.path.dirname(__file__), "scraped_urls.txt")
+        self.concurrency = concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.recrawl = recrawl
+        # Processes parsing pages in parallel; 0 parses on a thread in-process
+        self.parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self.html_parser = html_parser
+        # Drop chunks that repeat an earlier chunk of the crawl (boilerplate)
+        self.dedup = dedup
+        self.respect_robots = respect_robots
+        # Seed the frontier from the site's sitemaps (at most max_sitemaps files)
+        self.use_sitemaps = use_sitemaps
+        self.max_sitemaps = max_sitemaps
+        self.crawl_state = CrawlState(crawl_state_path)
+        self.history_file = history_path
         self.visited = self._load_history()
-        self.documents = []
-        
+        self._host_limiters = {}
+        self._robots = {}
+        self._robots_locks = {}
+
 
 
     def _load_history(self):
-        """Loads previously scraped URLs from disk."""
+        """Loads the dedup keys (normalize_url) of previously scraped URLs from disk."""
         if not os.path.exists(self.history_file):
             return set()
         with open(self.history_file, "r") as f:
-            return set(line.strip() for line in f if line.strip())
+            return set(normalize_url(line) for line in f if line.strip())
 
     def _save_url(self, url):
         """Appends a new URL to the history file."""
         with open(self.history_file, "a") as f:
             f.write(url + "\n")
 
+    def _complete_page(self, url, record):
+        """Called once a page is fully indexed: updates history and crawl state."""
+        key = normalize_url(url)
+        if key not in self.visited:
+            self.visited.add(key)
+            self._save_url(url)
+        self.crawl_state.record(url, **record)
+
     def is_valid_url(self, url):
         parsed = urlparse(url)
         # Must have netloc, scheme, and be within the same domain/path hierarchy as start_url
         return bool(parsed.netloc) and bool(parsed.scheme) and url.startswith(self.start_url)
 
+    def _limiter_for(self, url):
+        """
+        Returns the shared HostLimiter for the url's host. A robots.txt
+        Crawl-delay lowers the host's rate to one request per delay.
+        """
+        host = urlparse(url).netloc
+        if host not in self._host_limiters:
+            rate = self.per_host_rate
+            robots = self._robots.get(host)
+            delay = robots.crawl_delay(USER_AGENT) if robots else None
+            if delay:
+                rate = min(rate, 1.0 / delay) if rate else 1.0 / delay
+            self._host_limiters[host] = HostLimiter(self.per_host_concurrency, rate)
+        return self._host_limiters[host]
+
+    async def _robots_for(self, client, url):
+        """Fetches and caches the robots.txt of the url's host."""
+        parsed = urlparse(url)
+        host = parsed.netloc
+        if host in self._robots:
+            return self._robots[host]
+        async with self._robots_locks.setdefault(host, asyncio.Lock()):
+            if host not in self._robots:
+                robots_url = f"{parsed.scheme}://{host}/robots.txt"
+                try:
+                    response = await client.get(robots_url)
+                    robots = parse_robots(response.status_code, response.text)
+                except httpx.HTTPError as e:
+                    print(f"   Could not fetch {robots_url} ({e}); not crawling {host}")
+                    robots = parse_robots(None, "")
+                delay = robots.crawl_delay(USER_AGENT)
+                if delay:
+                    print(f"🤖 {host}: Crawl-delay {delay}s")
+                self._robots[host] = robots
+        return self._robots[host]
+
+    async def _allowed(self, client, url):
+        if not self.respect_robots:
+            return True
+        robots = await self._robots_for(client, url)
+        return robots.can_fetch(USER_AGENT, url)
+
+    def _push(self, frontier, url, depth, lastmod=None, priority=None):
+        """
+        Queues a URL inside the crawl scope, ranked by crawl_policy.url_priority.
+        Returns whether it was queued.
+        """
+        return self.is_valid_url(url) and frontier.push(url, depth, url_priority(url, depth, lastmod, priority))
+
+    async def _seed_from_sitemaps(self, client, frontier):
+        """
+        Queues every in-scope URL of the site's sitemaps: the ones robots.txt
+        lists, or /sitemap.xml. Entries rank by lastmod and <priority>, and
+        count as linked from the start page.
+        """
+        parsed = urlparse(self.start_url)
+        robots = await self._robots_for(client, self.start_url) if self.respect_robots else None
+        pending = deque((robots.site_maps() if robots else None) or [f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"])
+        fetched, seeded = set(), 0
+        while pending and len(fetched) < self.max_sitemaps:
+            sitemap_url = pending.popleft()
+            if sitemap_url in fetched:
+                continue
+            fetched.add(sitemap_url)
+            try:
+                async with self._limiter_for(sitemap_url):
+                    response = await client.get(sitemap_url)
+            except httpx.HTTPError as e:
+                print(f"   Error fetching sitemap {sitemap_url}: {e}")
+                continue
+            if response.status_code != 200:
+                continue
+            entries, children = parse_sitemap(response.content)
+            pending.extend(children)
+            for entry in entries:
+                seeded += self._push(frontier, entry.url, 1, entry.lastmod, entry.priority)
+        if seeded:
+            print(f"🗺️  Seeded {seeded} URLs from {len(fetched)} sitemap(s).")
+
     def scrape(self):
-        print(f"💎 Starting Jewel Scrape on {self.start_url}")
+        """Blocking entry point. Runs the async crawl to completion."""
+        asyncio.run(self.scrape_async())
+
+    async def scrape_async(self):
+        """
+        Streams pages through fetch -> parse/chunk -> embed -> write stages
+        connected by bounded queues, so memory stays flat however large the
+        crawl is. A URL only goes into the history once all of its chunks are
+        stored; an interrupted crawl resumes with the pages that were lost.
+
+        With recrawl=True, previously scraped pages are revalidated with
+        conditional requests instead of being skipped; a 304 or an identical
+        body skips parse/chunk/embed and only follows the stored links.
+        """
+        print(f"💎 Starting Jewel {'Recrawl' if self.recrawl else 'Scrape'} on {self.start_url}")
         print(f"💎 Loaded {len(self.visited)} previously scraped URLs.")
-        
-        # Use a queue for BFS to handle recursion nicely without stack overflow risks
-        # Queue stores tuples: (url, current_depth)
-        queue = [(self.start_url, 0)]
-        
-        pages_scraped_this_session = 0
-        
-        while queue and pages_scraped_this_session < self.max_pages:
-            current_url, depth = queue.pop(0)
-            
-            if current_url in self.visited:
-                continue
-            
-            if depth > self.max_depth:
+
+        # Priority frontier shared by the worker pool (breadth-first unless
+        # sitemaps or the URL say otherwise). Outside recrawl mode anything
+        # already in the history counts as seen, so it is never queued at all.
+        frontier = PriorityFrontier(seen=() if self.recrawl else self.visited)
+        self._push(frontier, self.start_url, 0)
+
+        self._active = 0
+        self._wakeup = asyncio.Event()
+        self._in_flight = 0
+        self._pending_chunks = {}
+        self._index_changed = False
+        self.pages_scraped_this_session = 0
+        self.pages_unchanged_this_session = 0
+        self.chunks_indexed_this_session = 0
+        self._near_duplicates = None
+        if self.dedup:
+            # Blocks already in the index keep their owner whichever page is parsed first
+            self._near_duplicates = NearDuplicateFilter()
+            self._near_duplicates.seed(await asyncio.to_thread(stored_fingerprints))
+
+        # One parser task per pool process keeps every process busy
+        parsers = max(1, self.parse_workers)
+        pool = parse_pool(self.parse_workers) if self.parse_workers else None
+
+        page_queue = asyncio.Queue(maxsize=max(self.concurrency, parsers) * 2)
+        chunk_queue = asyncio.Queue(maxsize=self.batch_size * 2)
+        batch_queue = asyncio.Queue(maxsize=2)
+        parse_tasks = [asyncio.create_task(self._parse_stage(frontier, page_queue, chunk_queue, pool)) for _ in range(parsers)]
+        stages = [
+            asyncio.create_task(self._embed_stage(chunk_queue, batch_queue)),
+            asyncio.create_task(self._write_stage(batch_queue)),
+        ]
+
+        try:
+            # One keep-alive client for the whole crawl
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            headers = {"User-Agent": USER_AGENT}
+            async with httpx.AsyncClient(timeout=10, limits=limits, headers=headers, follow_redirects=True) as client:
+                if self.use_sitemaps:
+                    await self._seed_from_sitemaps(client, frontier)
+                workers = [asyncio.create_task(self._worker(client, frontier, page_queue)) for _ in range(self.concurrency)]
+                await asyncio.gather(*workers)
+
+            # Every page is parsed by now; the sentinels drain the remaining stages.
+            for _ in parse_tasks:
+                await page_queue.put(None)
+            await asyncio.gather(*parse_tasks)
+            await chunk_queue.put(None)
+            await asyncio.gather(*stages)
+        finally:
+            if pool:
+                pool.shutdown()
+            if self._index_changed:
+                # Once per session: the agent drops its caches and rebuilds
+                # the keyword index once, not after every batch
+                index_version.bump()
+
+        print(f"💎 Scrape session complete. Processed {self.pages_scraped_this_session} pages ({self.pages_unchanged_this_session} unchanged), indexed {self.chunks_indexed_this_session} chunks.")
+        if self._near_duplicates:
+            stats = self._near_duplicates.stats()
+            print(f"💎 Skipped {stats['dropped']} of {stats['chunks']} chunks as near-duplicates (~{stats['saved_embedding_tokens']} embedding tokens, {stats['dropped_chars'] // 1024} KB of text).")
+
+    async def _worker(self, client, frontier, page_queue):
+        while True:
+            if not frontier:
+                # Nothing queued and nobody left to discover more links: done.
+                if self._active == 0:
+                    self._wakeup.set()
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
                 continue
 
-            print(f"   Searching ({depth}): {current_url}")
-            
+            current_url, depth = frontier.pop()
+            self._active += 1
+            handed_off = False
             try:
-                # 1. Fetch Page
-                response = requests.get(current_url, timeout=10)
-                if response.status_code != 200:
-                    print(f"   Skipping {current_url} (Status {response.status_code})")
-                    continue
-                
-                # Mark as visited IMMEDIATELY to prevent cycles in queue
-                self.visited.add(current_url)
-                self._save_url(current_url)
-                pages_scraped_this_session += 1
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 2. Extract Metadata & Images
-                title = soup.title.string if soup.title else current_url
-                images = []
-                for img in soup.find_all('img'):
-                    src = img.get('src')
-                    if src:
-                        absolute_src = urljoin(current_url, src)
-                        images.append(absolute_src)
-                
-                # 3. Clean and Convert
-                for element in soup(['script', 'style', 'nav', 'footer', 'header']):
-                    element.decompose()
-                
-                main_content = soup.find('main') or soup.body
-                if not main_content:
-                    continue
-                    
-                markdown_text = md(str(main_content), heading_style="ATX")
-                
-                # 4. Chunk & Store
-                chunks = self._create_chunks(markdown_text, title, current_url, images)
-                self.documents.extend(chunks) # Store in memory buffer
+                handed_off = await self._fetch_page(client, frontier, page_queue, current_url, depth)
+            except Exception as e:
+                print(f"   Error scraping {current_url}: {e}")
+            finally:
+                # Pages handed to the parse stage stay active until their
+                # links have been pushed onto the frontier.
+                if not handed_off:
+                    self._page_done()
+
+    def _page_done(self):
+        self._active -= 1
+        self._wakeup.set()
+
+    async def _fetch_page(self, client, frontier, page_queue, current_url, depth):
+        if depth > self.max_depth:
+            return False
+
+        if not await self._allowed(client, current_url):
+            print(f"   Skipping {current_url} (robots.txt)")
+            return False
+
+        # Pages being fetched right now count against the budget, so the pool
+        # never scrapes more than max_pages even with many workers in flight.
+        if self.pages_scraped_this_session + self._in_flight >= self.max_pages:
+            return False
+
+        print(f"   Searching ({depth}): {current_url}")
+
+        # 1. Fetch Page (conditionally, when revalidating a known page)
+        state = self.crawl_state.get(current_url) if self.recrawl else None
+        headers = self.crawl_state.conditional_headers(current_url) if state else {}
+        self._in_flight += 1
+        try:
+            async with self._limiter_for(current_url):
+                response = await client.get(current_url, headers=headers)
+        finally:
+            self._in_flight -= 1
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+        if state and response.status_code == 304:
+            self._revalidated(frontier, current_url, depth, state, etag, last_modified)
+            return False
+
+        if response.status_code != 200:
+            print(f"   Skipping {current_url} (Status {response.status_code})")
+            return False
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        if state and state["content_hash"] == content_hash:
+            self._revalidated(frontier, current_url, depth, state, etag, last_modified)
+            return False
+
+        self.pages_scraped_this_session += 1
+
+        record = {"etag": etag, "last_modified": last_modified, "content_hash": content_hash}
+        await page_queue.put((current_url, depth, response.text, record))
+        return True
+
+    def _revalidated(self, frontier, current_url, depth, state, etag, last_modified):
+        """The page did not change: refresh its state and follow the stored links."""
+        self.pages_scraped_this_session += 1
+        self.pages_unchanged_this_session += 1
+        self.crawl_state.touch(current_url, etag, last_modified)
+        if depth < self.max_depth:
+            for next_url in state["links"]:
+                self._push(frontier, next_url, depth + 1)
+
+    async def _parse_stage(self, frontier, page_queue, chunk_queue, pool):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await page_queue.get()
+            if item is None:
+                return
+
+            current_url, depth, html, record = item
+            try:
+                # 2-4. Parse, clean, convert and split off the event loop
+                page = await loop.run_in_executor(pool, parse_page, current_url, html, self.html_parser)
+                chunks = self._create_chunks(page, current_url)
+                # The page is pruned against all of its chunks, so a block
+                # dropped here as another page's copy is never deleted for it
+                chunk_ids = {chunk.id for chunk in chunks}
+                if self._near_duplicates:
+                    chunks = self._near_duplicates.filter(chunks)
+                kept = {chunk.metadata["chunk_index"] for chunk in chunks}
+                image_urls = [image_url for i, _, urls in page.chunks if i in kept for image_url in urls]
+                if image_urls:
+                    # Store the image URLs once, before any chunk refers to them
+                    await asyncio.to_thread(get_image_table().intern, image_urls)
+                links = page.links
+                record["links"] = links
+
+                if chunks:
+                    self._pending_chunks[current_url] = [len(chunks), chunk_ids, record]
+                    for chunk in chunks:
+                        await chunk_queue.put(chunk)
+                else:
+                    # Nothing to write; prune what the page no longer has and it is complete
+                    if await asyncio.to_thread(delete_stale_chunks, current_url, chunk_ids):
+                        self._index_changed = True
+                    self._complete_page(current_url, record)
 
                 # 5. Find links for recursion
                 # Only add to queue if we haven't reached depth limit
                 if depth < self.max_depth:
-                    for link in soup.find_all('a'):
-                        href = link.get('href')
-                        if href:
-                            next_url = urljoin(current_url, href)
-                            # Strip fragment identifiers
-                            next_url = next_url.split('#')[0]
-                            
-                            if self.is_valid_url(next_url) and next_url not in self.visited:
-                                queue.append((next_url, depth + 1))
-                                
-                time.sleep(0.5) # Be polite
+                    for next_url in links:
+                        self._push(frontier, next_url, depth + 1)
+            except Exception as e:
+                print(f"   Error parsing {current_url}: {e}")
+            finally:
+                self._page_done()
+
+    async def _embed_stage(self, chunk_queue, batch_queue):
+        batch = []
+        done = False
+        while not done:
+            try:
+                chunk = await asyncio.wait_for(chunk_queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                chunk = False  # Idle: flush whatever is buffered
+
+            if chunk is None:
+                done = True
+            elif chunk is not False:
+                batch.append(chunk)
+                if len(batch) < self.batch_size:
+                    continue
+
+            if batch:
+                try:
+                    # Chunks already stored under the same ID need no embedding
+                    new_chunks = await asyncio.to_thread(filter_new, batch)
+                    vectors = await asyncio.to_thread(embed_documents, new_chunks) if new_chunks else []
+                    await batch_queue.put((batch, new_chunks, vectors))
+                except Exception as e:
+                    print(f"   Error embedding {len(batch)} chunks: {e}")
+                batch = []
 
+        await batch_queue.put(None)
+
+    async def _write_stage(self, batch_queue):
+        while True:
+            item = await batch_queue.get()
+            if item is None:
+                return
+
+            batch, new_chunks, vectors = item
+            try:
+                if new_chunks:
+                    await asyncio.to_thread(write_documents, new_chunks, vectors)
+                    self._index_changed = True
             except Exception as e:
-                print(f"   Error scraping {current_url}: {e}")
+                print(f"   Error writing {len(new_chunks)} chunks: {e}")
+                continue
 
-        print(f"💎 Scrape session complete. Processed {pages_scraped_this_session} new pages.")
-        
-        insert_data(self.documents)
+            self.chunks_indexed_this_session += len(new_chunks)
+            for doc in batch:
+                url = doc.metadata["source"]
+                pending = self._pending_chunks[url]
+                pending[0] -= 1
+                if pending[0] == 0:
+                    # 6. All chunks stored: drop whatever the page no longer
+                    # contains, then record it in the history and crawl state
+                    del self._pending_chunks[url]
+                    try:
+                        if await asyncio.to_thread(delete_stale_chunks, url, pending[1]):
+                            self._index_changed = True
+                    except Exception as e:
+                        print(f"   Error pruning stale chunks of {url}: {e}")
+                        continue
+                    self._complete_page(url, pending[2])
 
-    def _create_chunks(self, text, title, url, images):
+    def _create_chunks(self, page, url):
         """
-        Splits text into chunks using MarkdownTextSplitter to preserve heading structure.
+        Wraps the chunk texts of a ParsedPage into Documents with stable IDs.
+        Images are referenced by their image_table ID.
         """
-        splitter = MarkdownTextSplitter(chunk_size=1000, chunk_overlap=100)
-        content_chunks = splitter.split_text(text)
-        
         docs = []
-        for i, chunk in enumerate(content_chunks):
-            if not chunk.strip(): continue
-            
+        for i, chunk, image_urls in page.chunks:
             metadata = {
                 "source": url,
-                "title": title,
+                "title": page.title,
                 "chunk_index": i,
-                "image_urls": ",".join(images[:10])
+                "image_ids": ",".join(image_id(image_url) for image_url in image_urls)
             }
-            
-            docs.append(Document(page_content=chunk, metadata=metadata))
-            
+
+            docs.append(Document(id=chunk_id(url, i, chunk), page_content=chunk, metadata=metadata))
+
         return docs
 
 if __name__ == "__main__":
-    import sys
-    url_arg = sys.argv[1] if len(sys.argv) > 1 else None
-    
-    if url_arg:
-        scraper = JewelScraper(url_arg)
-        scraper.scrape()
-    else:
-        print("Usage: python scraper.py <url>")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrape a site into the knowledge base.")
+    parser.add_argument("url")
+    parser.add_argument("--max-depth", type=int, default=3)
+    parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--recrawl", action="store_true", help="Revalidate previously scraped pages instead of skipping them")
+    parser.add_argument("--parse-workers", type=int, default=None, help="Parse processes (default: one per core, 0: in-process)")
+    parser.add_argument("--html-parser", default=HTML_PARSER, help="BeautifulSoup backend, e.g. lxml or html.parser")
+    parser.add_argument("--no-dedup", action="store_true", help="Index near-duplicate chunks instead of skipping them")
+    parser.add_argument("--ignore-robots", action="store_true", help="Don't fetch or obey robots.txt")
+    parser.add_argument("--no-sitemaps", action="store_true", help="Only discover pages by following links")
+    args = parser.parse_args()
+
+    scraper = JewelScraper(args.url, max_depth=args.max_depth, max_pages=args.max_pages, concurrency=args.concurrency, recrawl=args.recrawl, parse_workers=args.parse_workers, html_parser=args.html_parser, dedup=not args.no_dedup, respect_robots=not args.ignore_robots, use_sitemaps=not args.no_sitemaps)
+    scraper.scrape()
@@ -0,0 +1,172 @@
+"""
+Two-level cache in front of the knowledge-base search.
+
+1. Exact: LRU keyed by the normalized query text and the result count k,
+   with a TTL.
+2. Semantic (optional): if a new query's embedding is within
+   `similarity_threshold` cosine similarity of a cached one with the same k,
+   reuse its results.
+
+Both levels are dropped as soon as index_version changes, i.e. whenever the
+knowledge base is re-ingested.
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import index_version
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """'What's your Refund Policy?' -> 'whats your refund policy'"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub("", query.lower())).strip()
+
+
+class VersionedLRU:
+    """
+    Thread-safe LRU whose entries expire `ttl` seconds after they are stored
+    and are all dropped when index_version changes. Counts hits, misses and
+    stores. SearchCache and answer_cache.AnswerCache are built on it.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._version = index_version.current()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _check_version(self):
+        version = index_version.current()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key):
+        """The live value stored under key, or None."""
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def live_items(self):
+        """(key, value) of every entry that has not expired, oldest first."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_version()
+            return [(key, entry[1]) for key, entry in self._entries.items() if entry[0] > now]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Hit/miss/store counters and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+
+class SearchCache:
+    def __init__(self, maxsize=512, ttl=300.0, similarity_threshold=None):
+        self.similarity_threshold = similarity_threshold
+        self._entries = VersionedLRU(maxsize, ttl)  # (normalized query, k) -> (unit vector, results)
+        self._lock = threading.Lock()
+        self.semantic_hits = 0
+
+    @property
+    def exact_hits(self):
+        return self._entries.hits
+
+    @property
+    def misses(self):
+        # Every semantic hit was an exact miss first
+        return self._entries.misses - self.semantic_hits
+
+    def get(self, query, k):
+        """Exact lookup of the top-k results. Returns cached results or None."""
+        entry = self._entries.get((normalize_query(query), k))
+        return entry[1] if entry is not None else None
+
+    def get_similar(self, query, vector, k):
+        """
+        Semantic lookup by query embedding. Only call it after get() missed:
+        the miss get() counted turns into a semantic hit here.
+        """
+        if self.similarity_threshold is None:
+            return None
+
+        unit = _unit(vector)
+        live = [(key, entry) for key, entry in self._entries.live_items() if key[1] == k]
+        if live:
+            import numpy as np
+
+            scores = np.stack([entry[0] for _, entry in live]) @ unit
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity_threshold:
+                with self._lock:
+                    self.semantic_hits += 1
+                results = live[best][1][1]
+                self._entries.put((normalize_query(query), k), (unit, results))
+                return results
+        return None
+
+    def put(self, query, vector, results, k):
+        self._entries.put((normalize_query(query), k), (_unit(vector), results))
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and the overall hit rate."""
+        exact_hits, semantic_hits, misses = self.exact_hits, self.semantic_hits, self.misses
+        lookups = exact_hits + semantic_hits + misses
+        return {
+            "exact_hits": exact_hits,
+            "semantic_hits": semantic_hits,
+            "misses": misses,
+            "hit_rate": (exact_hits + semantic_hits) / lookups if lookups else 0.0,
+            "size": len(self._entries),
+        }
+
+
+def _unit(vector):
+    import numpy as np
+
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -1,18 +1,115 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional, Literal
-
-class ContentBlock(BaseModel):
-    type: str # 'markdown' | 'flashcards' | 'key_value' | 'image' | 'form'
-    # Add optional fields to handle all types of content blocks
-    content: Optional[str] = None
-    data: Optional[Dict[str, Any]] = None
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing import List, Dict, Any, Optional, Literal, Union
+from typing_extensions import Annotated
+
+# Tools that put a card on the frontend (show_dynamic_card is render_ui's
+# alias, both in main.py); the middleware matches tool calls against these
+CARD_TOOLS = ("render_ui", "show_dynamic_card")
+
+
+def tool_name(tool):
+    """Name of a bound tool, an OpenAI-style tool dict or a CopilotKit action."""
+    if isinstance(tool, dict):
+        return tool.get("name") or tool.get("function", {}).get("name")
+    return tool.name
+
+
+def frontend_renders(state):
+    """
+    Whether the connected frontend renders cards itself, i.e. registered
+    render_ui as a CopilotKit action. Without one (API callers, benchmarks)
+    card calls have to be answered on the server.
+    """
+    actions = (state.get("copilotkit") or {}).get("actions") or []
+    return any(tool_name(action) == "render_ui" for action in actions)
+
+# One model per block type the frontend registry can render
+# (src/components/dynamic/registry.tsx); "type" picks the model.
+
+class MarkdownBlock(BaseModel):
+    type: Literal["markdown"]
+    content: str
+
+class FlashcardItem(BaseModel):
+    title: str
+    description: str
+    icon: Optional[str] = None
     url: Optional[str] = None
+    label: Optional[str] = None
+
+class FlashcardsBlock(BaseModel):
+    type: Literal["flashcards"]
+    items: List[FlashcardItem] = Field(..., min_length=1)
+
+class KeyValueBlock(BaseModel):
+    type: Literal["key_value"]
+    data: Dict[str, Union[str, int, float, bool]]
+
+class ImageBlock(BaseModel):
+    type: Literal["image"]
+    url: str
     alt: Optional[str] = None
-    fields: Optional[List[Dict[str, Any]]] = None
+    caption: Optional[str] = None
+
+class FormOption(BaseModel):
+    label: str
+    value: str
+
+class FormField(BaseModel):
+    name: str
+    label: str
+    type: Literal["text", "number", "email", "password", "select", "textarea"] = "text"
+    placeholder: Optional[str] = None
+    options: Optional[List[FormOption]] = None
+    required: Optional[bool] = None
+
+class FormBlock(BaseModel):
+    type: Literal["form"]
+    fields: List[FormField] = Field(..., min_length=1)
+    action: str
+    id: Optional[str] = None
     submitLabel: Optional[str] = None
-    action: Optional[str] = None
-    text: Optional[str] = None
-    items: Optional[List[Dict[str, Any]]] = None
+
+class LinkBlock(BaseModel):
+    type: Literal["link"]
+    url: str
+    label: Optional[str] = None
+
+ContentBlock = Annotated[
+    Union[MarkdownBlock, FlashcardsBlock, KeyValueBlock, ImageBlock, FormBlock, LinkBlock],
+    Field(discriminator="type"),
+]
+
+# Built once at import; validating through these skips per-call schema setup
+CONTENT_BLOCK_VALIDATOR = TypeAdapter(ContentBlock)
+CONTENT_VALIDATOR = TypeAdapter(List[ContentBlock])
+
+
+def content_errors(content) -> List[str]:
+    """
+    Readable problems with a render_ui content list, one line per error,
+    e.g. "content[1] (flashcards): items.0.description: Field required".
+    Empty when the content is valid.
+    """
+    try:
+        CONTENT_VALIDATOR.validate_python(content)
+        return []
+    except ValidationError as exc:
+        errors = []
+        for error in exc.errors():
+            location = list(error["loc"])
+            if not location or not isinstance(location[0], int):
+                errors.append(f"content: {error['msg']}")
+                continue
+            index, rest = location[0], location[1:]
+            block = content[index] if isinstance(content[index], dict) else {}
+            # The union puts the block type in the location; it's in the prefix already
+            if rest and rest[0] == block.get("type"):
+                rest = rest[1:]
+            path = ".".join(str(part) for part in rest)
+            prefix = f"content[{index}] ({block.get('type', 'no type')})"
+            errors.append(f"{prefix}: {path + ': ' if path else ''}{error['msg']}")
+        return errors
 
 class UIResponse(BaseModel):
     title: str
@@ -23,7 +120,8 @@ class UIResponse(BaseModel):
     dimensions: Optional[Dict[str, Any]] = None
 
 class AgentOutputSchema(BaseModel):
+    """Final answer of a turn: the chat message and, for UI answers, the card to render."""
     thought: str
     response_mode: Literal["chat", "ui"]
     chat_message: str
-    ui_data: Optional[UIResponse] = None
\ No newline at end of file
+    ui_data: Optional[UIResponse] = None
@@ -0,0 +1,96 @@
+"""
+Opt-in single-shot UI answers (AGENT_RESPONSE_MODE=structured).
+
+In the default tool-calling mode a UI turn costs two model calls: one that
+emits render_ui and one, after the tool result, that writes the chat
+message. In structured mode the model instead finishes every turn with one
+AgentOutputSchema generation (structure.py) that carries both the chat
+message and the card. It is validated by create_agent's structured output,
+and invalid payloads are sent back to the model to fix.
+
+This middleware hides render_ui from the model and rewrites the structured
+answer into what the rest of the stack expects: an AIMessage holding the
+chat message and a render_ui call for the card. With the CopilotKit frontend
+connected, that call is handed to the frontend like any other render_ui.
+The follow-up run that the frontend starts after rendering is ended before
+the model is called, because the answer text is already there. Without a
+frontend, the call is answered in place.
+"""
+
+import os
+
+from langchain.agents.middleware import AgentMiddleware, hook_config
+from langchain_core.messages import AIMessage, RemoveMessage, SystemMessage, ToolMessage
+
+from structure import CARD_TOOLS, AgentOutputSchema, frontend_renders, tool_name
+
+RESPONSE_MODE = os.getenv("AGENT_RESPONSE_MODE", "tools")
+OUTPUT_TOOL = AgentOutputSchema.__name__
+
+STRUCTURED_INSTRUCTIONS = """
+
+response_format:
+  mode: "STRUCTURED"
+  instruction: >
+    render_ui is not available. Finish every turn by calling AgentOutputSchema exactly once:
+    response_mode "ui" with the card in ui_data (same fields as render_ui), or "chat" for text-only replies.
+    chat_message is the brief, voice-friendly message. ui_data holds one card, so present several items as flashcards inside it."""
+
+
+class StructuredResponseMiddleware(AgentMiddleware):
+    """Turns AgentOutputSchema answers into a chat message plus render_ui call."""
+
+    def _prepare(self, request):
+        tools = [tool for tool in request.tools if tool_name(tool) not in CARD_TOOLS]
+        prompt = request.system_message.content if request.system_message else ""
+        return request.override(tools=tools, system_message=SystemMessage(content=prompt + STRUCTURED_INSTRUCTIONS))
+
+    def wrap_model_call(self, request, handler):
+        return handler(self._prepare(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(self._prepare(request))
+
+    @hook_config(can_jump_to=["end"])
+    def before_model(self, state, runtime):
+        # The frontend reports back after rendering the card; the answer text
+        # was already sent with it, so there is nothing left to generate
+        messages = state["messages"]
+        if not messages or not isinstance(messages[-1], ToolMessage):
+            return None
+        for message in reversed(messages):
+            if isinstance(message, AIMessage):
+                answered = message.content and message.tool_calls
+                if answered and all(call["name"] in CARD_TOOLS for call in message.tool_calls):
+                    return {"jump_to": "end"}
+                return None
+        return None
+
+    def after_model(self, state, runtime):
+        messages = state["messages"]
+        if len(messages) < 2 or not isinstance(messages[-1], ToolMessage) or messages[-1].name != OUTPUT_TOOL:
+            return None
+        output = state.get("structured_response")
+        ai_message, tool_message = messages[-2], messages[-1]
+        if not isinstance(output, AgentOutputSchema) or not isinstance(ai_message, AIMessage):
+            return None
+
+        tool_calls = []
+        if output.response_mode == "ui" and output.ui_data is not None:
+            tool_calls.append({
+                "id": tool_message.tool_call_id,
+                "name": "render_ui",
+                "args": output.ui_data.model_dump(exclude_none=True),
+            })
+        answer = AIMessage(id=ai_message.id, content=output.chat_message, tool_calls=tool_calls)
+
+        if tool_calls and not frontend_renders(state):
+            result = ToolMessage(
+                id=tool_message.id,
+                content=f"UI card '{output.ui_data.title}' rendered.",
+                tool_call_id=tool_message.tool_call_id,
+                name="render_ui",
+            )
+            return {"messages": [answer, result]}
+        # The frontend answers the render_ui call itself
+        return {"messages": [answer, RemoveMessage(id=tool_message.id)]}
@@ -190,7 +190,7 @@ for service in services:
 ### Step 2: Fetch Data
 ```python
 results = search_knowledge_base(query="relevant search terms")
-# Parse the results - you'll get JSON with content, source, and images
+# Parse the results - you'll get JSON results grouped by source: content excerpts and images
 ```
 
 ### Step 3: Decide on Approach
@@ -542,7 +542,7 @@ workflow:
     2. 
       name: "Fetch"
       tool: "search_knowledge_base"
-      instruction: "Retrieve necessary data. If data is missing, use internal general knowledge but prioritize the KB."
+      instruction: "Retrieve necessary data. If data is missing, use internal general knowledge but prioritize the KB. When several topics are needed, issue all search_knowledge_base calls together in one response; they run in parallel."
     
     3. 
       name: "Plan Layout"
@@ -555,8 +555,8 @@ workflow:
     5. 
       name: "Render"
       tool: "render_ui"
-      mode: "STREAMING"
-      instruction: "Call render_ui sequentially for each card. This creates a pleasing 'appearance' animation."
+      mode: "PARALLEL"
+      instruction: "Emit all render_ui calls for the answer together in one response, in display order. The cards still appear one after another in that order."
     
     6. 
       name: "Respond"
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import embeddings
+import image_table
+import index_version
+import insert_data_db
+from embeddings import EmbeddingService, HashingEmbeddings
+from image_table import ImageTable
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """Index, image table, index version and embeddings in tmp_path, offline."""
+    monkeypatch.setattr(embeddings, "_service", EmbeddingService(HashingEmbeddings(), cache_path=None))
+    monkeypatch.setattr(index_version, "INDEX_VERSION_PATH", str(tmp_path / "index_version"))
+    # Restored after the test; open_store() replaces both
+    monkeypatch.setattr(insert_data_db, "_vectorstore", None)
+    monkeypatch.setattr(insert_data_db, "_collection", None)
+    insert_data_db.open_store(str(tmp_path / "chroma"))
+    monkeypatch.setattr(image_table, "_image_table", ImageTable(str(tmp_path / "images.sqlite3")))
+    return tmp_path
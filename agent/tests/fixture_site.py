@@ -0,0 +1,107 @@
+"""
+A local fixture site for the scraper: write_site() generates linked pages,
+serve() serves a directory on 127.0.0.1 through FixtureHandler, which
+records every request. Shared by the scraper tests and
+benchmarks.crawl_throughput.
+"""
+
+import os
+import time
+import random
+import threading
+import contextlib
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from scraper import JewelScraper
+
+WORDS = ["ring", "gold", "silver", "diamond", "sapphire", "clasp", "chain", "polished", "engraved", "pendant", "carat", "setting"]
+
+
+def write_site(root, pages, links_per_page=6, seed=7):
+    """Writes /index.html and /page/0.html ... /page/{pages - 1}.html, densely interlinked."""
+    rng = random.Random(seed)
+
+    def write(path, title, links):
+        anchors = "".join(f'<li><a href="{href}">{text}</a></li>' for href, text in links)
+        body = " ".join(rng.choice(WORDS) for _ in range(400))
+        full = os.path.join(root, path.lstrip("/"))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write(f"<html><head><title>{title}</title></head><body><main><h1>{title}</h1><p>{body}</p><ul>{anchors}</ul></main></body></html>")
+
+    write("/index.html", "Home", [(f"/page/{n}.html", f"Page {n}") for n in range(min(pages, 10))])
+    for n in range(pages):
+        targets = [(n + 1) % pages] + rng.sample(range(pages), min(links_per_page, pages))
+        # Fragments and repeated links: the same page under several URLs
+        links = [(f"/page/{t}.html", f"Page {t}") for t in targets] + [(f"/page/{targets[0]}.html#details", "Details"), ("/index.html", "Home")]
+        write(f"/page/{n}.html", f"Page {n}", links)
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves the site with a fixed delay and records every request."""
+
+    latency = 0.0
+    requests = []
+    started = []
+    in_flight = 0
+    max_in_flight = 0
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls._lock:
+            cls.requests.append(self.path)
+            cls.started.append(time.perf_counter())
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(cls.latency)
+            super().do_GET()
+        finally:
+            with cls._lock:
+                cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+    @classmethod
+    def reset(cls, latency=0.0):
+        with cls._lock:
+            cls.latency = latency
+            cls.requests = []
+            cls.started = []
+            cls.in_flight = 0
+            cls.max_in_flight = 0
+
+    @classmethod
+    def page_requests(cls):
+        return [path for path in cls.requests if path.endswith(".html") or path == "/"]
+
+
+@contextlib.contextmanager
+def serve(directory, latency=0.0):
+    """Serves `directory` on 127.0.0.1; yields the base URL."""
+    FixtureHandler.reset(latency)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def scraper_for(base, directory, **options):
+    """
+    A JewelScraper for the site at `base` whose crawl state and history live
+    in `directory`. robots.txt and sitemaps are off unless `options` turn
+    them on.
+    """
+    options = {"respect_robots": False, "use_sitemaps": False, "parse_workers": 0, "flush_interval": 0.2, **options}
+    return JewelScraper(
+        f"{base}/",
+        crawl_state_path=os.path.join(directory, "crawl_state.sqlite3"),
+        history_path=os.path.join(directory, "scraped_urls.txt"),
+        **options,
+    )
@@ -0,0 +1,131 @@
+"""robots.txt, sitemaps and priority ordering, against a local fixture site (tests.fixture_site)."""
+
+import gzip
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from crawl_policy import parse_sitemap
+from tests.fixture_site import FixtureHandler, scraper_for, serve
+
+TODAY = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def write(root, path, content):
+    full = os.path.join(root, path.lstrip("/"))
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb" if isinstance(content, bytes) else "w") as f:
+        f.write(content)
+
+
+def write_page(root, path, links=()):
+    anchors = "".join(f'<a href="{href}">{href}</a>' for href in links)
+    write(root, path, f"<html><head><title>{path}</title></head><body><main><h1>{path}</h1><p>Gold rings on {path}.</p>{anchors}</main></body></html>")
+
+
+def urlset(base, entries):
+    """A <urlset> of (path, lastmod, priority) entries; None leaves a field out."""
+    urls = ""
+    for path, lastmod, priority in entries:
+        fields = f"<loc>{base}{path}</loc>"
+        if lastmod:
+            fields += f"<lastmod>{lastmod}</lastmod>"
+        if priority is not None:
+            fields += f"<priority>{priority}</priority>"
+        urls += f"<url>{fields}</url>"
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+
+
+def sitemap_index(base, paths):
+    sitemaps = "".join(f"<sitemap><loc>{base}{path}</loc></sitemap>" for path in paths)
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{sitemaps}</sitemapindex>'
+
+
+def crawl(base, storage, **options):
+    scraper = scraper_for(base, str(storage), concurrency=1, per_host_rate=0, **options)
+    scraper.scrape()
+    return scraper
+
+
+@pytest.fixture
+def site(tmp_path):
+    return str(tmp_path / "site")
+
+
+def test_parse_sitemap_reads_plain_and_gzipped():
+    xml = urlset("http://shop.test", [("/a", "2024-05-01", 0.8), ("/b", None, None)])
+    for content in (xml.encode(), gzip.compress(xml.encode())):
+        entries, children = parse_sitemap(content)
+        assert [entry.url for entry in entries] == ["http://shop.test/a", "http://shop.test/b"]
+        assert entries[0].priority == 0.8 and entries[0].lastmod is not None
+        assert children == []
+
+
+@pytest.mark.parametrize("content", [
+    gzip.compress(b"<urlset><url><loc>http://shop.test/a</loc></url></urlset>")[:20],  # truncated
+    b"\x1f\x8b" + b"not gzip at all",  # gzip magic, corrupt body
+    b"<urlset><url><loc>",  # malformed XML
+], ids=["truncated-gzip", "corrupt-gzip", "malformed-xml"])
+def test_parse_sitemap_ignores_corrupt_files(content):
+    assert parse_sitemap(content) == ([], [])
+
+
+def test_robots_disallow_is_honored(site, storage):
+    write(site, "/robots.txt", "User-agent: *\nDisallow: /private/\n")
+    write_page(site, "/index.html", ["/page/1.html", "/private/secret.html"])
+    write_page(site, "/page/1.html")
+    write_page(site, "/private/secret.html")
+
+    with serve(site) as base:
+        crawl(base, storage, respect_robots=True)
+
+    assert "/robots.txt" in FixtureHandler.requests
+    assert sorted(FixtureHandler.page_requests()) == ["/", "/page/1.html"]
+
+
+def test_crawl_delay_sets_the_host_interval(site, storage):
+    write(site, "/robots.txt", "User-agent: *\nCrawl-delay: 2\n")
+    write_page(site, "/index.html")
+
+    with serve(site) as base:
+        scraper = scraper_for(base, str(storage), respect_robots=True, per_host_rate=10.0)
+        scraper.scrape()
+
+    # Crawl-delay 2 beats the configured 10 requests/s
+    assert scraper._limiter_for(f"{base}/").min_interval == pytest.approx(2.0)
+
+
+def test_seeds_from_the_sitemaps_robots_lists(site, storage):
+    write_page(site, "/index.html")  # links to nothing: every other page comes from a sitemap
+    for path in ("/page/1.html", "/page/2.html", "/page/3.html", "/elsewhere.html"):
+        write_page(site, path)
+
+    with serve(site) as base:
+        write(site, "/robots.txt", f"User-agent: *\nAllow: /\nSitemap: {base}/sitemap_index.xml\n")
+        write(site, "/sitemap_index.xml", sitemap_index(base, ["/sitemap-plain.xml", "/sitemap-gzipped.xml.gz", "/sitemap-broken.xml.gz"]))
+        write(site, "/sitemap-plain.xml", urlset(base, [("/page/1.html", None, None)]))
+        write(site, "/sitemap-gzipped.xml.gz", gzip.compress(urlset(base, [("/page/2.html", None, None), ("/page/3.html", None, None)]).encode()))
+        write(site, "/sitemap-broken.xml.gz", gzip.compress(urlset(base, [("/elsewhere.html", None, None)]).encode())[:30])
+        crawl(base, storage, respect_robots=True, use_sitemaps=True)
+
+    # /sitemap.xml is only the fallback; the truncated sitemap is skipped, not fatal
+    assert "/sitemap.xml" not in FixtureHandler.requests
+    assert sorted(FixtureHandler.page_requests()) == ["/", "/page/1.html", "/page/2.html", "/page/3.html"]
+
+
+def test_sitemap_priority_orders_the_crawl(site, storage):
+    write_page(site, "/index.html")
+    for path in ("/products/new.html", "/page/1.html", "/page/2.html", "/tag/old.html"):
+        write_page(site, path)
+
+    with serve(site) as base:
+        write(site, "/sitemap.xml", urlset(base, [
+            ("/tag/old.html", "2015-01-01", None),  # stale listing page
+            ("/page/2.html", None, None),
+            ("/page/1.html", None, 0.5),
+            ("/products/new.html", TODAY, 1.0),  # fresh, high priority, product path
+        ]))
+        crawl(base, storage, use_sitemaps=True)
+
+    assert FixtureHandler.page_requests() == ["/products/new.html", "/", "/page/1.html", "/page/2.html", "/tag/old.html"]
@@ -0,0 +1,97 @@
+"""EmbeddingService caching and batching, with a fake embedder that records its calls."""
+
+import pytest
+
+from embeddings import EmbeddingService, HashingEmbeddings
+
+
+class RecordingEmbeddings(HashingEmbeddings):
+    """HashingEmbeddings that records every batch it is asked to embed."""
+
+    def __init__(self):
+        super().__init__(size=16)
+        self.batches = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return super().embed_query(text)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "embeddings.sqlite3")
+
+
+def texts(n, prefix="chunk"):
+    return [f"{prefix} number {i} about gold rings" for i in range(n)]
+
+
+def test_misses_are_embedded_in_batches(cache_path):
+    embedder = RecordingEmbeddings()
+    service = EmbeddingService(embedder, cache_path=cache_path, batch_size=4)
+
+    vectors = service.embed_documents(texts(10))
+
+    assert [len(batch) for batch in embedder.batches] == [4, 4, 2]
+    assert service.api_calls == 3
+    assert service.cache_hits == 0
+    assert vectors == HashingEmbeddings(size=16).embed_documents(texts(10))
+
+
+def test_repeated_texts_come_from_the_cache(cache_path):
+    embedder = RecordingEmbeddings()
+    service = EmbeddingService(embedder, cache_path=cache_path, batch_size=4)
+    first = service.embed_documents(texts(6))
+    embedder.batches.clear()
+
+    # Four cached texts and three new ones, in mixed order
+    mixed = texts(4) + texts(3, prefix="new")
+    vectors = service.embed_documents(mixed[::-1])
+
+    assert embedder.batches == [texts(3, prefix="new")[::-1]]
+    assert service.cache_hits == 4
+    # Cached vectors are stored as float32
+    for cached, original in zip(vectors[-4:], first[:4][::-1]):
+        assert cached == pytest.approx(original, abs=1e-6)
+
+
+def test_cache_survives_a_new_service(cache_path):
+    EmbeddingService(RecordingEmbeddings(), cache_path=cache_path).embed_documents(texts(5))
+
+    embedder = RecordingEmbeddings()
+    service = EmbeddingService(embedder, cache_path=cache_path)
+    service.embed_documents(texts(5))
+
+    assert embedder.batches == []
+    assert service.api_calls == 0
+    assert service.cache_hits == 5
+
+
+def test_duplicates_within_a_call_are_embedded_once(cache_path):
+    embedder = RecordingEmbeddings()
+    service = EmbeddingService(embedder, cache_path=cache_path)
+
+    vectors = service.embed_documents(["same text"] * 3 + ["other text"])
+
+    assert embedder.batches == [["same text", "other text"]]
+    assert vectors[0] == vectors[1] == vectors[2]
+
+
+def test_queries_are_cached_in_memory():
+    embedder = RecordingEmbeddings()
+    service = EmbeddingService(embedder, cache_path=None, query_cache_size=2)
+
+    service.embed_query("refund policy")
+    service.embed_query("refund policy")
+    service.embed_query("opening hours")
+    service.embed_query("store locations")
+    service.embed_query("refund policy")
+
+    # The third distinct query evicted the least recently used one
+    assert embedder.queries == ["refund policy", "opening hours", "store locations", "refund policy"]
+    assert service.cache_hits == 1
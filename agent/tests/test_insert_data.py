@@ -0,0 +1,67 @@
+"""insert_data against a throwaway Chroma store (the storage fixture)."""
+
+from langchain_core.documents import Document
+
+import insert_data_db
+from insert_data_db import insert_data
+
+SHARED = (
+    "Every ring is cast in recycled gold and finished by hand in our Antwerp workshop. "
+    "Resizing is free for the first year, and engraving takes two working days."
+)
+# The same block as another page carries it: different case, punctuation and spacing
+SHARED_COPY = "every ring is cast in recycled gold, and finished by hand in our  Antwerp workshop! " + SHARED.split(". ", 1)[1].upper()
+
+
+def page(source, *texts):
+    return [Document(page_content=text, metadata={"source": source, "chunk_index": i}) for i, text in enumerate(texts)]
+
+
+def stored(source):
+    """{chunk ID: text} stored for source."""
+    found = insert_data_db._get_vectorstore().get(where={"source": source}, include=["documents"])
+    return dict(zip(found["ids"], found["documents"]))
+
+
+def test_near_copy_on_another_page_keeps_the_original(storage):
+    insert_data(page("https://shop.test/a", SHARED, "Page A talks about sapphire pendants."))
+    a_chunks = stored("https://shop.test/a")
+
+    insert_data(page("https://shop.test/b", SHARED_COPY, "Page B talks about silver chains."))
+
+    # B's copy is not embedded, and nothing of A's is touched
+    assert list(stored("https://shop.test/b").values()) == ["Page B talks about silver chains."]
+    assert stored("https://shop.test/a") == a_chunks
+
+    # A re-ingested as it was: its own block is not a duplicate of anything
+    insert_data(page("https://shop.test/a", SHARED, "Page A talks about sapphire pendants."))
+    assert stored("https://shop.test/a") == a_chunks
+
+    # Both pages again, B parsed first: A still owns the block
+    insert_data(page("https://shop.test/b", SHARED_COPY, "Page B talks about silver chains.") + page("https://shop.test/a", SHARED, "Page A talks about sapphire pendants."))
+    assert stored("https://shop.test/a") == a_chunks
+    assert list(stored("https://shop.test/b").values()) == ["Page B talks about silver chains."]
+
+
+def test_same_documents_twice_are_upserted(storage):
+    docs = page("https://shop.test/c", "Opening hours are nine to six.", "We ship to every country in the EU.")
+    insert_data(docs)
+    first = stored("https://shop.test/c")
+
+    insert_data(page("https://shop.test/c", "Opening hours are nine to six.", "We ship to every country in the EU."))
+
+    assert stored("https://shop.test/c") == first
+    assert insert_data_db._get_collection().count() == 2
+
+
+def test_reingest_prunes_exactly_the_removed_chunk(storage):
+    texts = ["Rings come in sizes 44 to 70.", "Necklaces are 42 cm long.", "Bracelets fit wrists up to 19 cm."]
+    insert_data(page("https://shop.test/d", *texts))
+    before = stored("https://shop.test/d")
+
+    # The page lost its last chunk
+    insert_data(page("https://shop.test/d", *texts[:2]))
+
+    after = stored("https://shop.test/d")
+    assert set(before) - set(after) == {next(id for id, text in before.items() if text == texts[2])}
+    assert {id: before[id] for id in after} == after
@@ -0,0 +1,22 @@
+"""Prompt assembly: both variants share a prefix long enough for OpenAI's prompt cache."""
+
+from langchain_core.messages import HumanMessage
+
+from prompt_builder import LAYOUT_GUIDE, PROMPT_CACHE_MIN_TOKENS, STATIC_PREFIX, build_prompt
+
+
+def approximate_tokens(text):
+    # Prompt prose runs at ~4 characters per token
+    return len(text) // 4
+
+
+def test_static_prefix_is_cacheable_on_its_own():
+    assert approximate_tokens(STATIC_PREFIX) >= PROMPT_CACHE_MIN_TOKENS
+
+
+def test_both_variants_start_with_the_static_prefix():
+    with_layout = build_prompt([HumanMessage(content="Show me your services.")])
+    without_layout = build_prompt([HumanMessage(content="Thanks, that's great")])
+
+    assert with_layout == STATIC_PREFIX + "\n\n" + LAYOUT_GUIDE
+    assert without_layout == STATIC_PREFIX
@@ -0,0 +1,108 @@
+"""JewelScraper against a local fixture site (tests.fixture_site)."""
+
+import asyncio
+
+import pytest
+
+from scraper import HostLimiter
+from tests.fixture_site import FixtureHandler, scraper_for, serve, write_site
+
+PAGES = 30
+
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / "site"
+    write_site(str(root), PAGES)
+    return str(root)
+
+
+def crawl(base, storage, **options):
+    scraper = scraper_for(base, str(storage), **options)
+    scraper.scrape()
+    return scraper
+
+
+def test_stops_at_max_pages(site, storage):
+    with serve(site, latency=0.02) as base:
+        scraper = crawl(base, storage, max_pages=10, concurrency=8)
+    assert scraper.pages_scraped_this_session == 10
+    assert len(FixtureHandler.page_requests()) == 10
+
+
+def test_fetches_every_page_once(site, storage):
+    with serve(site) as base:
+        scraper = crawl(base, storage, max_pages=100, concurrency=8)
+    fetched = FixtureHandler.page_requests()
+    # Repeated links and #fragments never cause a second fetch
+    assert len(fetched) == len(set(fetched))
+    assert {f"/page/{n}.html" for n in range(PAGES)} <= set(fetched)
+    assert scraper.pages_scraped_this_session == len(fetched)
+
+
+def test_history_skips_pages_of_earlier_sessions(site, storage):
+    with serve(site) as base:
+        crawl(base, storage, max_pages=100)
+        FixtureHandler.reset()
+        scraper = crawl(base, storage, max_pages=100)
+    assert scraper.pages_scraped_this_session == 0
+    assert FixtureHandler.page_requests() == []
+
+
+def test_fetches_links_as_written(tmp_path, storage):
+    # Directory pages: the server 301s /about to /about/, so the normalized
+    # form is only a dedup key and never what gets fetched
+    root = tmp_path / "slashes"
+    (root / "about").mkdir(parents=True)
+    (root / "index.html").write_text('<html><body><main><p>Home of gold rings.</p><a href="/about/">About</a><a href="/about">About</a></main></body></html>')
+    (root / "about" / "index.html").write_text("<html><body><main><p>About our workshop.</p></main></body></html>")
+
+    with serve(str(root)) as base:
+        scraper = crawl(base, storage)
+
+    assert "/about" not in FixtureHandler.requests
+    assert FixtureHandler.requests.count("/about/") == 1
+    assert scraper.pages_scraped_this_session == 2
+    with open(scraper.history_file) as f:
+        assert sorted(f.read().split()) == [f"{base}/", f"{base}/about/"]
+
+
+def test_per_host_concurrency(site, storage):
+    with serve(site, latency=0.05) as base:
+        crawl(base, storage, max_pages=20, concurrency=8, per_host_concurrency=2, per_host_rate=0)
+    assert FixtureHandler.max_in_flight == 2
+
+
+class FakeClock:
+    """A clock that only moves when something sleeps on it."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_host_limiter_spaces_request_starts(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(asyncio, "sleep", clock.sleep)
+    limiter = HostLimiter(max_concurrency=4, rate=20.0, clock=clock)
+    starts = []
+
+    async def request():
+        async with limiter:
+            starts.append(clock())
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(6)))
+
+    asyncio.run(main())
+    assert starts == pytest.approx([100.0 + n / 20.0 for n in range(6)])
+
+
+def test_per_host_rate_reaches_the_limiter(tmp_path):
+    scraper = scraper_for("http://127.0.0.1:1", str(tmp_path), per_host_rate=20.0)
+    assert scraper._limiter_for("http://127.0.0.1:1/page/0.html").min_interval == pytest.approx(1 / 20.0)
@@ -0,0 +1,85 @@
+"""SearchCache keying, expiry and invalidation, on a fake clock."""
+
+from types import SimpleNamespace
+
+import pytest
+
+import index_version
+import search_cache
+from search_cache import SearchCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(search_cache, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def version_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_version, "INDEX_VERSION_PATH", str(tmp_path / "index_version"))
+
+
+def test_results_are_keyed_on_k(clock):
+    cache = SearchCache()
+    cache.put("Refund policy?", [1.0, 0.0], ["a", "b", "c"], k=3)
+
+    assert cache.get("refund  policy", 3) == ["a", "b", "c"]
+    # A k=3 answer is never served for k=8
+    assert cache.get("refund policy", 8) is None
+
+
+def test_similar_lookup_only_matches_the_same_k(clock):
+    cache = SearchCache(similarity_threshold=0.9)
+    cache.put("refund policy", [1.0, 0.0], ["a", "b", "c"], k=3)
+
+    assert cache.get_similar("how do refunds work", [0.99, 0.05], 8) is None
+    assert cache.get_similar("how do refunds work", [0.99, 0.05], 3) == ["a", "b", "c"]
+    # The match is stored under the new query
+    assert cache.get("how do refunds work", 3) == ["a", "b", "c"]
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = SearchCache(ttl=300.0, similarity_threshold=0.9)
+    cache.put("refund policy", [1.0, 0.0], ["a"], k=3)
+
+    clock.now += 299
+    assert cache.get("refund policy", 3) == ["a"]
+    clock.now += 2
+    assert cache.get("refund policy", 3) is None
+    assert cache.get_similar("refund policy", [1.0, 0.0], 3) is None
+
+
+def test_reingest_drops_every_entry(clock):
+    cache = SearchCache(similarity_threshold=0.9)
+    cache.put("refund policy", [1.0, 0.0], ["a"], k=3)
+    cache.put("opening hours", [0.0, 1.0], ["b"], k=3)
+
+    index_version.bump()
+
+    assert cache.get("refund policy", 3) is None
+    assert cache.get_similar("opening hours", [0.0, 1.0], 3) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_stats_count_exact_semantic_and_misses(clock):
+    cache = SearchCache(similarity_threshold=0.9)
+    cache.put("refund policy", [1.0, 0.0], ["a"], k=3)
+
+    cache.get("refund policy", 3)
+    if cache.get("refunds", 3) is None:
+        cache.get_similar("refunds", [0.98, 0.1], 3)
+    if cache.get("opening hours", 3) is None:
+        cache.get_similar("opening hours", [0.0, 1.0], 3)
+
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 1)
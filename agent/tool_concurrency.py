@@ -0,0 +1,82 @@
+"""
+Bounded parallel execution of the tool calls in one model response.
+
+create_agent already fans every pending tool call of an AIMessage out as its
+own task in the same graph step, and LangGraph applies their results in
+tool-call order, so ToolMessages come back deterministically ordered no
+matter which call finishes first. What it doesn't do is bound that fan-out:
+a response with eight searches would open eight Chroma queries and eight
+embedding requests at once. This middleware caps how many tool calls of one
+conversation run at the same time (TOOL_CONCURRENCY, default 4); the rest
+wait for a slot. The limit is per thread_id, so one user's fan-out never
+holds up another session's tools; without a thread it applies per model
+response.
+
+The prompt asks the model to batch independent calls (several searches, all
+cards of an answer) into a single response, which is what makes them
+parallel in the first place.
+"""
+
+import os
+import asyncio
+import threading
+
+from langchain.agents.middleware import AgentMiddleware
+
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+
+
+def _scope(request):
+    """The conversation a tool call belongs to, else the model response that made it."""
+    config = getattr(request.runtime, "config", None) or {}
+    thread_id = (config.get("configurable") or {}).get("thread_id")
+    if thread_id is not None:
+        return thread_id
+    state = request.state if isinstance(request.state, dict) else {}
+    messages = state.get("messages") or ()
+    return messages[-1].id if messages and messages[-1].id else request.tool_call["id"]
+
+
+class ToolConcurrencyMiddleware(AgentMiddleware):
+    """Limits the number of tool calls executing at once per conversation."""
+
+    def __init__(self, max_concurrency=TOOL_CONCURRENCY):
+        super().__init__()
+        self.max_concurrency = max_concurrency
+        # (event loop or None, scope) -> [semaphore, calls using it]; asyncio
+        # primitives belong to one loop. Entries go once their last call ends.
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _checkout(self, key, factory):
+        with self._lock:
+            entry = self._slots.get(key)
+            if entry is None:
+                entry = self._slots[key] = [factory(self.max_concurrency), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._slots[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._slots[key]
+
+    def wrap_tool_call(self, request, handler):
+        key = (None, _scope(request))
+        slots = self._checkout(key, threading.BoundedSemaphore)
+        try:
+            with slots:
+                return handler(request)
+        finally:
+            self._release(key)
+
+    async def awrap_tool_call(self, request, handler):
+        key = (asyncio.get_running_loop(), _scope(request))
+        slots = self._checkout(key, asyncio.Semaphore)
+        try:
+            async with slots:
+                return await handler(request)
+        finally:
+            self._release(key)
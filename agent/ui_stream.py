@@ -0,0 +1,138 @@
+"""
+Streams render_ui cards to the frontend while the model is still writing them.
+
+A render_ui call for a big layout can take seconds to generate, and the
+frontend only runs its render_ui handler once the arguments are complete.
+This middleware watches the tool-call chunks of every model call as they
+stream in, parses the partial arguments, and whenever another content block
+of a card is complete and validates against structure.ContentBlock, emits
+the card through CopilotKit's intermediate state as
+
+    state["ui_stream"] = {card id: {"id", "title", "content", "design", ...}}
+
+The card is keyed by its `id` (RenderUISchema lists it first so it streams
+first), or by the tool call id when the model doesn't give one. The frontend
+shows these cards block by block. The final render_ui call then updates the
+same card, matched by id or title.
+
+`ui_stream` is declared on AgentState, since AG-UI drops snapshot keys that
+aren't in the output schema. CopilotKit keeps re-sending the last manually
+emitted state for the rest of the run, so once the model call is done the
+middleware emits the state once more with `ui_stream` empty, and clears any
+cards the client echoed back in its input state.
+"""
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.utils.json import parse_partial_json
+from langgraph.config import get_config
+from pydantic import ValidationError
+
+from structure import CARD_TOOLS, CONTENT_BLOCK_VALIDATOR
+EMIT_STATE_EVENT = "copilotkit_manually_emit_intermediate_state"
+# State keys that never go to the frontend with a streamed snapshot
+_PRIVATE_STATE = ("messages", "copilotkit", "structured_response", "jump_to")
+
+
+class CardStreamer:
+    """Collects streamed tool-call chunks and snapshots the cards in them."""
+
+    def __init__(self):
+        self._calls = {}  # chunk index -> {"id", "name", "args", "key"}
+        self._cards = {}  # card key -> card with only complete, valid blocks
+
+    def feed(self, tool_call_chunks):
+        """Adds chunks; returns True if a card gained a complete block."""
+        touched = set()
+        for chunk in tool_call_chunks:
+            call = self._calls.setdefault(chunk.get("index") or 0, {"id": None, "name": None, "args": ""})
+            call["id"] = call["id"] or chunk.get("id")
+            call["name"] = call["name"] or chunk.get("name")
+            call["args"] += chunk.get("args") or ""
+            touched.add(chunk.get("index") or 0)
+        return any([self._update(self._calls[index]) for index in touched])
+
+    def _update(self, call):
+        if call["name"] not in CARD_TOOLS:
+            return False
+        try:
+            args = parse_partial_json(call["args"])
+        except Exception:
+            return False
+        # Once "content" has started, the id and title before it are final
+        if not isinstance(args, dict) or not isinstance(args.get("content"), list) or not args.get("title"):
+            return False
+
+        # Every block but the last is closed; the last one may still be growing
+        blocks = []
+        for raw in args["content"][:-1]:
+            try:
+                blocks.append(CONTENT_BLOCK_VALIDATOR.validate_python(raw).model_dump(exclude_none=True))
+            except ValidationError:
+                continue
+
+        key = call.setdefault("key", args.get("id") or call["id"])
+        previous = self._cards.get(key)
+        if previous is not None and len(previous["content"]) >= len(blocks):
+            return False
+        card = {key_: value for key_, value in args.items() if key_ != "content"}
+        self._cards[key] = {**card, "id": key, "content": blocks}
+        return True
+
+    def cards(self):
+        return dict(self._cards)
+
+
+class _CardStreamHandler(AsyncCallbackHandler):
+    def __init__(self, config, state):
+        self.config = config
+        self.state = {key: value for key, value in state.items() if key not in _PRIVATE_STATE}
+        self.streamer = CardStreamer()
+        self.emitted = 0
+
+    async def on_llm_new_token(self, token, *, chunk=None, **kwargs):
+        message = getattr(chunk, "message", None)
+        chunks = getattr(message, "tool_call_chunks", None)
+        if chunks and self.streamer.feed(chunks):
+            self.emitted += 1
+            await self.emit(self.streamer.cards())
+
+    async def emit(self, cards):
+        await adispatch_custom_event(EMIT_STATE_EVENT, {**self.state, "ui_stream": cards}, config=self.config)
+
+
+class UIStreamMiddleware(AgentMiddleware):
+    """Emits partial render_ui cards as intermediate state during model calls."""
+
+    def wrap_model_call(self, request, handler):
+        # Intermediate state is only dispatched on the async (server) path
+        return handler(request)
+
+    async def awrap_model_call(self, request, handler):
+        try:
+            config = get_config()
+        except RuntimeError:
+            return await handler(request)
+        callbacks = config.get("callbacks")
+        if callbacks is None or isinstance(callbacks, list):
+            return await handler(request)
+
+        stream_handler = _CardStreamHandler(config, request.state)
+        callbacks.add_handler(stream_handler, inherit=True)
+        try:
+            response = await handler(request)
+        finally:
+            callbacks.remove_handler(stream_handler)
+        if stream_handler.emitted:
+            # The complete render_ui call is in the response; the partial
+            # cards are done, and this snapshot is the one later node exits reuse
+            await stream_handler.emit({})
+        return response
+
+    def before_agent(self, state, runtime):
+        # The client echoes the last snapshot's cards back with its next
+        # message; replaying them would re-add cards the user has closed
+        if state.get("ui_stream"):
+            return {"ui_stream": {}}
+        return None
@@ -1,6 +1,6 @@
 "use client";
 
-import React, { useState, useRef, useEffect } from "react";
+import React, { useState, useRef, useEffect, useCallback } from "react";
 import { CopilotChat } from "@copilotkit/react-ui";
 import { useCoAgent, useFrontendTool, useCopilotChat } from "@copilotkit/react-core";
 import { Role, TextMessage } from "@copilotkit/runtime-client-gql";
@@ -256,6 +256,13 @@ export default function App() {
     const canvasRef = useRef<HTMLDivElement>(null);
     const lastSyncedDimensionsRef = useRef({ width: 0, height: 0 });
 
+    // addWidget reads the top z-index from here, so it keeps one identity
+    // across renders (the ui_stream effect depends on it)
+    const highestZRef = useRef(highestZ);
+    useEffect(() => {
+        highestZRef.current = highestZ;
+    }, [highestZ]);
+
     const bringToFront = (id: string) => {
         setHighestZ(prev => prev + 1);
         setWidgets(prev => prev.map(w => w.id === id ? { ...w, zIndex: highestZ + 1 } : w));
@@ -265,9 +272,9 @@ export default function App() {
         setWidgets(prev => prev.filter(w => w.id !== id));
     };
 
-    const addWidget = (type: Widget["type"], title: string, data: any, id?: string, shouldClear: boolean = false, initialSize?: { width: number; height: number | "auto" }) => {
+    const addWidget = useCallback((type: Widget["type"], title: string, data: any, id?: string, shouldClear: boolean = false, initialSize?: { width: number; height: number | "auto" }) => {
         const newId = id || Math.random().toString(36).substring(7);
-        let position = { x: 0, y: 0 };
+        const zIndex = highestZRef.current + 1;
 
         // Clear all cards if requested
         if (shouldClear) {
@@ -276,8 +283,8 @@ export default function App() {
                 type,
                 title,
                 data,
-                zIndex: highestZ + 1,
-                position,
+                zIndex,
+                position: { x: 0, y: 0 },
                 initialSize
             };
             setHighestZ(prev => prev + 1);
@@ -295,57 +302,50 @@ export default function App() {
         // Calculate how many cards fit per row
         const cardsPerRow = Math.floor(availableWidth / (cardWidth + padding)) || 1;
 
-        // Check if updating existing card
-        const existingIndex = widgets.findIndex(w => (id && w.id === id) || (type === "dynamic_card" && w.title === title));
+        // Update the card if it's already on the canvas (streamed cards land
+        // there first), otherwise place it after the current cards. Both
+        // decisions use the latest widgets, not this render's `widgets`.
+        setWidgets(prev => {
+            const existingIndex = prev.findIndex(w => (id && w.id === id) || (type === "dynamic_card" && w.title === title));
 
-        if (existingIndex !== -1) {
-            setWidgets(prev => {
+            if (existingIndex !== -1) {
                 const newWidgets = [...prev];
                 const existing = newWidgets[existingIndex];
                 newWidgets[existingIndex] = {
                     ...existing,
                     title,
                     data: { ...existing.data, ...data },
-                    zIndex: highestZ + 1,
+                    zIndex,
                     initialSize: initialSize || existing.initialSize
                 };
                 return newWidgets;
-            });
-            setHighestZ(prev => prev + 1);
-            return;
-        }
-
-        // Calculate position for NEW card
-        const currentCardCount = widgets.length;
-        const col = currentCardCount % cardsPerRow;
-        const row = Math.floor(currentCardCount / cardsPerRow);
+            }
 
-        position = {
-            x: col * (cardWidth + padding) + padding,
-            y: row * (cardHeight + padding) + padding
-        };
+            // Calculate position for NEW card
+            const currentCardCount = prev.length;
+            const col = currentCardCount % cardsPerRow;
+            const row = Math.floor(currentCardCount / cardsPerRow);
 
-        const newWidget: Widget = {
-            id: newId,
-            type,
-            title,
-            data,
-            zIndex: highestZ + 1,
-            position,
-            initialSize: initialSize || { width: cardWidth, height: "auto" }
-        };
+            const position = {
+                x: col * (cardWidth + padding) + padding,
+                y: row * (cardHeight + padding) + padding
+            };
 
-        // Add new card
+            return [...prev, {
+                id: newId,
+                type,
+                title,
+                data,
+                zIndex,
+                position,
+                initialSize: initialSize || { width: cardWidth, height: "auto" }
+            }];
+        });
         setHighestZ(prev => prev + 1);
-        setWidgets(prev => [...prev, newWidget]);
 
-        // Track recent cards for potential batch layout
-        setRecentCards(prev => {
-            const updated = [...prev, newId];
-            // Keep only last 20 cards in tracking
-            return updated.slice(-20);
-        });
-    };
+        // Track recent cards for potential batch layout (last 20)
+        setRecentCards(prev => prev.includes(newId) ? prev : [...prev, newId].slice(-20));
+    }, [canvasDimensions.width]);
 
     // --- CANVAS DIMENSION TRACKING ---
     useEffect(() => {
@@ -398,6 +398,18 @@ export default function App() {
         }
     }, [canvasDimensions]); // Only depend on canvasDimensions, NOT setState
 
+    // Cards the agent is still generating arrive block by block as ui_stream;
+    // the final render_ui call later updates the same card (same id / title).
+    // Several snapshots can land before a re-render, which is why addWidget
+    // matches and places cards against the latest widgets.
+    const streamedCards = (state as any)?.ui_stream as Record<string, any> | undefined;
+    useEffect(() => {
+        if (!streamedCards) return;
+        Object.values(streamedCards).forEach((card: any) => {
+            addWidget("dynamic_card", card.title, { title: card.title, content: card.content, design: card.design }, card.id, false, card.dimensions);
+        });
+    }, [streamedCards, addWidget]);
+
     const { appendMessage, isLoading } = useCopilotChat({
         id: "main-chat"
     });
@@ -406,6 +418,8 @@ export default function App() {
     useFrontendTool({
         name: "setThemeColor",
         parameters: [{ name: "themeColor", type: "string", required: true }],
+        // Pure UI action: no need for the agent to respond to the result
+        followUp: false,
         handler({ themeColor }) {
             setThemeColor(themeColor);
         },
@@ -450,6 +464,7 @@ export default function App() {
             { name: "id", type: "string", required: false },
             { name: "title", type: "string", required: false }
         ],
+        followUp: false,
         handler({ id, title }) {
             if (id) {
                 closeWidget(id);